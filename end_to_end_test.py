@@ -11,6 +11,7 @@ import sys
 import os
 import time
 import logging
+import statistics
 import requests
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
@@ -163,7 +164,7 @@ def test_laser_at_currents(
                     time.sleep(0.2)
 
                 if measurement['power_readings_mw']:
-                    avg_power = sum(measurement['power_readings_mw']) / len(measurement['power_readings_mw'])
+                    avg_power = statistics.fmean(measurement['power_readings_mw'])
                     measurement['power_average_mw'] = avg_power
                     logger.info(f"  Average Power: {avg_power:.3f} mW")
 
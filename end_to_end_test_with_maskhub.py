@@ -9,7 +9,6 @@ import sys
 import os
 import time
 import logging
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -63,8 +62,8 @@ MASKHUB_RUN_CONFIG = LaserRunConfig(
 
 
 def create_synthetic_raw_data(current_ma: float, voltage_v: float,
-                             duration_s: float = 1.0, sample_rate_hz: float = 100) -> pd.DataFrame:
-    """Create synthetic raw measurement data"""
+                             duration_s: float = 1.0, sample_rate_hz: float = 100) -> Dict[str, list]:
+    """Create synthetic raw measurement data as a column mapping"""
     n_samples = int(duration_s * sample_rate_hz)
     time_points = [i / sample_rate_hz for i in range(n_samples)]
 
@@ -72,12 +71,12 @@ def create_synthetic_raw_data(current_ma: float, voltage_v: float,
     current_noise = [current_ma + (i % 5 - 2) * 0.01 for i in range(n_samples)]
     voltage_noise = [voltage_v + (i % 3 - 1) * 0.001 for i in range(n_samples)]
 
-    return pd.DataFrame({
+    return {
         'time_s': time_points,
         'current_ma': current_noise,
         'voltage_v': voltage_noise,
-        'measurement_id': range(n_samples)
-    })
+        'measurement_id': list(range(n_samples))
+    }
 
 
 def test_laser_with_maskhub(laser_resource: str, laser_name: str,
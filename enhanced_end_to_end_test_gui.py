@@ -942,16 +942,21 @@ class EnhancedEndToEndTestGUI:
                     laser1_current = laser1.get_ld_current_actual() if laser1_connected else None
                     laser2_current = laser2.get_ld_current_actual() if laser2_connected else None
 
-                    # Get power meter readings
-                    power_readings = []
+                    # Get power meter readings (Welford running mean/variance)
+                    n_power, mean_power, m2_power = 0, 0.0, 0.0
                     for power_idx in range(self.power_readings_var.get()):
                         if power_meter.connected:
                             power_mw = power_meter.get_power_reading_channel1()
                             if power_mw is not None:
-                                power_readings.append(power_mw)
+                                n_power += 1
+                                delta = power_mw - mean_power
+                                mean_power += delta / n_power
+                                m2_power += delta * (power_mw - mean_power)
                         time.sleep(0.1)
 
-                    avg_power = sum(power_readings) / len(power_readings) if power_readings else None
+                    avg_power = mean_power if n_power else None
+                    # A spread from fewer than three samples is noise, not a statistic
+                    std_power = (m2_power / n_power) ** 0.5 if n_power >= 3 else None
 
                     # Update real-time display
                     self.message_queue.put(("measurements", (laser1_current, laser2_current, avg_power)))
@@ -962,8 +967,10 @@ class EnhancedEndToEndTestGUI:
                         log_parts.append(f"L1: {laser1_current:.2f}mA")
                     if laser2_current is not None:
                         log_parts.append(f"L2: {laser2_current:.2f}mA")
-                    if avg_power is not None:
-                        log_parts.append(f"Power: {avg_power:.3f}mW")
+                    if std_power is not None:
+                        log_parts.append(f"Power: {avg_power:.3f} ± {std_power:.3f}mW")
+                    elif avg_power is not None:
+                        log_parts.append(f"Power: {avg_power:.3f}mW (σ=N/A)")
 
                     if log_parts:
                         self.message_queue.put(("log", (f"  {' | '.join(log_parts)}", "info")))
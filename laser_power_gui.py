@@ -10,24 +10,48 @@ This GUI provides:
 
 import os
 import sys
+import argparse
+import logging
 import pathlib
-import glob
 import time
 import csv
 import datetime
 import threading
+import queue
+import array
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+from thorlabs_driver_path import DRIVER_DIR as _DRIVER_DIR, add_driver_paths
+
+_HERE = pathlib.Path(__file__).resolve().parent
+
 # Add modules to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'Python-Driver-for-Thorlabs-power-meter'))
-sys.path.extend(glob.glob(f'{pathlib.Path(__file__).parent.resolve()}/Python-Driver-for-Thorlabs-power-meter/*/**/', recursive=True))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'pumplaser'))
+add_driver_paths()
+sys.path.insert(0, str(_HERE / 'pumplaser'))
 
 from ThorlabsPowerMeter import ThorlabsPowerMeter
 from pumplaser import PumpLaser, list_visa_resources
 
+logger = logging.getLogger(__name__)
+
+# Rows kept in the manual history table; older rows stay in manual_data for export
+MANUAL_HISTORY_ROWS = 500
+
+# Write buffer for CSV output (default is 8 KiB)
+CSV_BUFFER_SIZE = 1 << 16
+
+SWEEP_FIELDNAMES = ['point', 'target_current_ma', 'actual_current_ma',
+                    'optical_power_mw', 'timestamp']
+
+# Thorlabs DLL folder; the driver expects a trailing separator
+DLL_PATH = os.path.join(_DRIVER_DIR, 'Thorlabs_DotNet_dll', '')
+
 
 class LaserPowerGUI:
     """GUI for automated and manual laser current vs power measurements."""
@@ -41,32 +65,53 @@ class LaserPowerGUI:
         self.power_meter = None
         self.laser = None
         self.logger = None
-        
-        # Measurement data
-        self.sweep_data = []
-        self.current_points = [
+        self._hw_average_time = None  # Averaging window last sent to the meter (s)
+        self._last_setpoint_ma = None  # Last current setpoint written to the laser
+        
+        # Measurement data (sweep rows are streamed to sweep_csv_path as measured)
+        self.sweep_csv_path = None
+        self.sweep_point_count = 0
+        self.manual_data = []  # (current, power_mw, time) in chronological order
+        self._manual_tree_items = deque()  # Displayed history item ids, oldest first
+        self._ts_cache = (0, "")  # (epoch second, formatted time) for _now_str
+        self.current_points = array.array('H', [
             130, 180, 230, 280, 330, 380, 430, 480, 530, 580,
             630, 680, 730, 780, 830, 880, 930, 980, 1030, 1080,
             1130, 1180, 1230, 1280, 1330, 1380, 1430, 1480
-        ]
+        ])
+        self._sweep_tree_items = []  # Sweep table item ids, one per current point
+        
+        # Query the laser's actual current every N sweep points (and on the last);
+        # other points record the setpoint
+        self.verify_every = 5
         
         # GUI state
         self.sweep_running = False
         self.manual_measurement_active = False
         
+        # Worker threads never touch Tk directly; they post updates here and
+        # the Tk thread applies them in _drain_ui_queue
+        self._ui_queue = queue.Queue()
+        # Tk variable updates coalesced into one after_idle pass, keyed by Tcl
+        # variable name (tk.Variable is unhashable)
+        self._pending_updates = {}
+        # Serializes VISA access between worker threads
+        self._laser_lock = threading.Lock()
+        # Runs manual laser commands off the Tk thread, one at a time and in order
+        self._laser_executor = ThreadPoolExecutor(max_workers=1)
+        # Set by emergency stop; current ramps check it before every step
+        self._ramp_abort = threading.Event()
+        
         self.setup_gui()
         self.auto_connect_instruments()
         self.update_instrument_status()
+        self.root.after(50, self._drain_ui_queue)
 
     def auto_connect_instruments(self):
         """Automatically attempt to connect to instruments on startup."""
         # Try to connect power meter automatically
         try:
-            # Provide explicit path to DLL folder
-            dll_path = os.path.join(os.path.dirname(__file__),
-                                   'Python-Driver-for-Thorlabs-power-meter',
-                                   'Thorlabs_DotNet_dll', '')
-            deviceList = ThorlabsPowerMeter.listDevices(libraryPath=dll_path)
+            deviceList = ThorlabsPowerMeter.listDevices(libraryPath=DLL_PATH)
 
             if deviceList.resourceCount > 0:
                 self.power_meter = deviceList.connect(deviceList.resourceName[0])
@@ -76,9 +121,10 @@ class LaserPowerGUI:
                     self.power_meter.setWaveLength(1550)
                     self.power_meter.setPowerAutoRange(True)
                     self.power_meter.setAverageTime(0.1)
-                    print(f"Auto-connected to power meter: {self.power_meter.sensorName}")
+                    self._hw_average_time = 0.1
+                    logger.info("Auto-connected to power meter: %s", self.power_meter.sensorName)
         except Exception as e:
-            print(f"Auto-connect power meter failed: {e}")
+            logger.warning("Auto-connect power meter failed: %s", e)
 
         # Try to connect laser automatically
         try:
@@ -100,11 +146,12 @@ class LaserPowerGUI:
                     # Initialize to safe state
                     self.laser.set_current(0)
                     self.laser.set_output(False)
-                    print(f"Auto-connected to laser: {laser_addr}")
+                    self._last_setpoint_ma = 0
+                    logger.info("Auto-connected to laser: %s", laser_addr)
                 else:
                     self.laser = None
         except Exception as e:
-            print(f"Auto-connect laser failed: {e}")
+            logger.warning("Auto-connect laser failed: %s", e)
 
     def setup_gui(self):
         """Create the GUI layout."""
@@ -438,8 +485,10 @@ class LaserPowerGUI:
     
     def populate_sweep_table(self):
         """Populate the sweep table with target current values."""
-        for i, current in enumerate(self.current_points):
+        self._sweep_tree_items = [
             self.sweep_tree.insert('', 'end', values=(i+1, current, '', ''))
+            for i, current in enumerate(self.current_points)
+        ]
     
     def update_instrument_status(self):
         """Update instrument status display."""
@@ -447,11 +496,7 @@ class LaserPowerGUI:
         if self.power_meter:
             # Get the actual device address
             try:
-                # Provide explicit path to DLL folder
-                dll_path = os.path.join(os.path.dirname(__file__),
-                                       'Python-Driver-for-Thorlabs-power-meter',
-                                       'Thorlabs_DotNet_dll', '')
-                deviceList = ThorlabsPowerMeter.listDevices(libraryPath=dll_path)
+                deviceList = ThorlabsPowerMeter.listDevices(libraryPath=DLL_PATH)
                 if deviceList.resourceCount > 0:
                     pm_address = deviceList.resourceName[0]
                     self.pm_address_var.set(pm_address)
@@ -514,11 +559,7 @@ class LaserPowerGUI:
             self.info_text.insert(tk.END, "Connecting to power meter...\n")
             self.info_text.see(tk.END)
 
-            # Provide explicit path to DLL folder
-            dll_path = os.path.join(os.path.dirname(__file__),
-                                   'Python-Driver-for-Thorlabs-power-meter',
-                                   'Thorlabs_DotNet_dll', '')
-            deviceList = ThorlabsPowerMeter.listDevices(libraryPath=dll_path)
+            deviceList = ThorlabsPowerMeter.listDevices(libraryPath=DLL_PATH)
             
             if deviceList.resourceCount == 0:
                 messagebox.showerror("Error", "No power meter devices found")
@@ -534,6 +575,7 @@ class LaserPowerGUI:
             self.power_meter.setWaveLength(1550)
             self.power_meter.setPowerAutoRange(True)
             self.power_meter.setAverageTime(0.1)
+            self._hw_average_time = 0.1
             
             self.info_text.insert(tk.END, f"Power meter connected: {self.power_meter.sensorName}\n")
             self.info_text.insert(tk.END, f"Serial: {self.power_meter.sensorSerialNumber}\n")
@@ -578,6 +620,7 @@ class LaserPowerGUI:
             # Initialize to safe state
             self.laser.set_current(0)
             self.laser.set_output(False)
+            self._last_setpoint_ma = 0
             
             identity = self.laser.get_identity()
             self.info_text.insert(tk.END, f"Laser connected: {identity}\n")
@@ -605,15 +648,17 @@ class LaserPowerGUI:
             return
         
         # Clear previous data
-        for item in self.sweep_tree.get_children():
-            self.sweep_tree.delete(item)
+        self.sweep_tree.delete(*self._sweep_tree_items)
         self.populate_sweep_table()
-        self.sweep_data.clear()
+        self._remove_sweep_csv()
+        self.sweep_point_count = 0
         
         # Update UI
         self.sweep_running = True
+        self._ramp_abort.clear()
         self.start_sweep_btn.configure(state=tk.DISABLED)
         self.stop_sweep_btn.configure(state=tk.NORMAL)
+        self.export_sweep_btn.configure(state=tk.DISABLED)
         self.progress_var.set(0)
         
         # Start measurement in separate thread
@@ -626,74 +671,128 @@ class LaserPowerGUI:
         try:
             readings_per_point = int(self.readings_var.get())
             stab_time = float(self.stab_time_var.get())
+            avg_time = self._configure_averaging(readings_per_point, 0.2)
             
-            for i, current_ma in enumerate(self.current_points):
-                if not self.sweep_running:  # Check for stop
-                    break
-                
-                # Update status
-                self.root.after(0, lambda: self.sweep_status_var.set(
-                    f"Measuring point {i+1}/{len(self.current_points)}: {current_ma} mA"))
-                
-                # Set laser current
-                self.laser.ramp_current(current_ma, step_ma=20, delay_s=0.1)
-                self.laser.set_output(True)
+            # Stream rows to a temp file as they are measured instead of holding them
+            fd, self.sweep_csv_path = tempfile.mkstemp(prefix='laser_sweep_', suffix='.csv')
+            with open(fd, 'w', newline='', buffering=CSV_BUFFER_SIZE) as csvfile, ThreadPoolExecutor(max_workers=1) as pool:
+                writer = csv.writer(csvfile)
+                writer.writerow(SWEEP_FIELDNAMES)
                 
-                # Wait for stabilization
-                time.sleep(stab_time)
-                
-                # Take power readings
-                power_readings = []
-                for j in range(readings_per_point):
+                n_points = len(self.current_points)
+                for i, current_ma in enumerate(self.current_points):
+                    if not self.sweep_running:  # Check for stop
+                        break
+                    point = i + 1
+                    
+                    # Update status
+                    self._ui_queue.put(('sweep_status',
+                        f"Measuring point {point}/{n_points}: {current_ma} mA"))
+                    
+                    # Set laser current
+                    with self._laser_lock:
+                        # An emergency stop during the ramp must not be undone
+                        if (not self._move_current(current_ma, step_ma=20, delay_s=0.1)
+                                or not self.sweep_running):
+                            break
+                        self.laser.set_output(True)
+                    
+                    # Wait for stabilization
+                    time.sleep(stab_time)
+                    
                     if not self.sweep_running:
                         break
-                    self.power_meter.updatePowerReading(0.2)
-                    power = self.power_meter.meterPowerReading
-                    power_readings.append(power)
-                    time.sleep(0.3)
-                
-                if not self.sweep_running:
-                    break
-                
-                # Calculate average
-                avg_power = sum(power_readings) / len(power_readings)
-                actual_current = self.laser.get_actual_current()
+                    
+                    # Read back the laser current while the meter averages;
+                    # the two instruments are on separate connections
+                    verify = i % self.verify_every == 0 or point == n_points
+                    if verify:
+                        actual_future = pool.submit(self._read_actual_current)
+                    
+                    # Take one reading averaged over the whole window by the meter
+                    self.power_meter.updatePowerReading(avg_time)
+                    avg_power = self.power_meter.meterPowerReading
+                    
+                    if verify:
+                        actual_current = actual_future.result()
+                        if abs(actual_current - current_ma) > 5:
+                            logger.warning("Laser current %.1f mA differs from setpoint %d mA",
+                                           actual_current, current_ma)
+                    else:
+                        actual_current = current_ma
+                    
+                    # Store data (row order matches SWEEP_FIELDNAMES)
+                    row = (point, current_ma, actual_current, avg_power * 1000,
+                           self._now_str())
+                    writer.writerow(row)
+                    # Points are seconds apart, so handing each row to the OS
+                    # costs nothing and a crash keeps every measured point
+                    csvfile.flush()
+                    logger.debug("Point %d/%d: %d mA -> %.3f mW", point, n_points,
+                                 current_ma, row[3])
+                    self.sweep_point_count += 1
+                    
+                    # Update table and progress
+                    self._ui_queue.put(('sweep_row', i, row))
+                    self._ui_queue.put(('progress', point))
                 
-                # Store data
-                measurement = {
-                    'point': i + 1,
-                    'target_current_ma': current_ma,
-                    'actual_current_ma': actual_current,
-                    'optical_power_mw': avg_power * 1000,
-                    'timestamp': datetime.datetime.now().strftime("%H:%M:%S")
-                }
-                self.sweep_data.append(measurement)
-                
-                # Update table
-                self.root.after(0, lambda idx=i, data=measurement: self.update_sweep_table_row(idx, data))
-                
-                # Update progress
-                self.root.after(0, lambda: self.progress_var.set(i + 1))
+                # Sync to disk once per sweep rather than once per point
+                os.fsync(csvfile.fileno())
             
             # Disable laser
-            self.laser.set_output(False)
-            self.laser.ramp_current(0, step_ma=50, delay_s=0.1)
-            
-            # Update UI
-            self.root.after(0, self.sweep_measurement_complete)
+            with self._laser_lock:
+                self.laser.set_output(False)
+                self._move_current(0, step_ma=50, delay_s=0.1)
             
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Sweep Error", f"Measurement failed: {str(e)}"))
-            self.root.after(0, self.sweep_measurement_complete)
-    
-    def update_sweep_table_row(self, row_index, data):
-        """Update a row in the sweep table."""
-        items = self.sweep_tree.get_children()
-        if row_index < len(items):
-            item = items[row_index]
-            self.sweep_tree.set(item, 'I Pump Laser (mA)', f"{data['actual_current_ma']:.1f}")
-            self.sweep_tree.set(item, 'O. Power (mW)', f"{data['optical_power_mw']:.3f}")
-            self.sweep_tree.set(item, 'Timestamp', data['timestamp'])
+            self._ui_queue.put(('error', "Sweep Error", f"Measurement failed: {str(e)}"))
+        
+        finally:
+            self._ui_queue.put(('sweep_complete',))
+    
+    def _read_actual_current(self):
+        """Query the measured laser current under the laser lock."""
+        with self._laser_lock:
+            return self.laser.get_actual_current()
+    
+    def _move_current(self, current_ma, step_ma, delay_s):
+        """
+        Move the laser to current_ma from the last known setpoint.
+        
+        Steps no larger than step_ma are written directly; larger moves are
+        ramped, checking for an emergency stop before every step. Caller must
+        hold self._laser_lock.
+        
+        Returns:
+            True if current_ma was reached, False if the ramp was aborted
+        """
+        setpoint_ma = self._last_setpoint_ma
+        if setpoint_ma is None:
+            setpoint_ma = self.laser.get_actual_current()
+        step_ma = step_ma if current_ma > setpoint_ma else -step_ma
+        
+        while abs(current_ma - setpoint_ma) > abs(step_ma):
+            if self._ramp_abort.is_set():
+                return False
+            setpoint_ma += step_ma
+            self.laser.set_current(setpoint_ma)
+            self._last_setpoint_ma = setpoint_ma
+            time.sleep(delay_s)
+        
+        if self._ramp_abort.is_set():
+            return False
+        self.laser.set_current(current_ma)
+        self._last_setpoint_ma = current_ma
+        return True
+    
+    def update_sweep_table_row(self, row_index, row):
+        """Update a row in the sweep table from a SWEEP_FIELDNAMES-ordered row."""
+        _, _, actual_current_ma, optical_power_mw, timestamp = row
+        if row_index < len(self._sweep_tree_items):
+            item = self._sweep_tree_items[row_index]
+            self.sweep_tree.set(item, 'I Pump Laser (mA)', f"{actual_current_ma:.1f}")
+            self.sweep_tree.set(item, 'O. Power (mW)', f"{optical_power_mw:.3f}")
+            self.sweep_tree.set(item, 'Timestamp', timestamp)
     
     def stop_sweep_measurement(self):
         """Stop the automated sweep measurement."""
@@ -705,7 +804,10 @@ class LaserPowerGUI:
         self.sweep_running = False
         self.start_sweep_btn.configure(state=tk.NORMAL)
         self.stop_sweep_btn.configure(state=tk.DISABLED)
-        self.sweep_status_var.set(f"Sweep complete - {len(self.sweep_data)} points measured")
+        # The sweep file is complete only once the worker has closed it
+        self.export_sweep_btn.configure(state=tk.NORMAL)
+        self._queue_update(self.sweep_status_var,
+                           f"Sweep complete - {self.sweep_point_count} points measured")
     
     def set_manual_current(self):
         """Set laser current manually."""
@@ -715,13 +817,22 @@ class LaserPowerGUI:
         
         try:
             current = float(self.manual_current_var.get())
-            self.laser.ramp_current(current, step_ma=20, delay_s=0.1)
-            self.update_actual_current()
-            
         except ValueError:
             messagebox.showerror("Error", "Invalid current value")
+            return
+        
+        # A new command from the user lifts a previous emergency stop
+        self._ramp_abort.clear()
+        self._laser_executor.submit(self._set_current_worker, current)
+    
+    def _set_current_worker(self, current_ma):
+        """Ramp to a manual setpoint (laser executor thread)."""
+        try:
+            with self._laser_lock:
+                self._move_current(current_ma, step_ma=20, delay_s=0.1)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to set current: {str(e)}")
+            self._ui_queue.put(('error', "Error", f"Failed to set current: {str(e)}"))
+        self._report_actual_current()
     
     def toggle_laser_output(self):
         """Toggle laser output on/off."""
@@ -730,20 +841,29 @@ class LaserPowerGUI:
             self.laser_output_var.set(False)
             return
         
+        self._laser_executor.submit(self._set_output_worker, self.laser_output_var.get())
+    
+    def _set_output_worker(self, enabled):
+        """Switch the laser output (laser executor thread)."""
         try:
-            self.laser.set_output(self.laser_output_var.get())
+            with self._laser_lock:
+                self.laser.set_output(enabled)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to toggle output: {str(e)}")
-            self.laser_output_var.set(False)
+            self._ui_queue.put(('error', "Error", f"Failed to toggle output: {str(e)}"))
+            self._ui_queue.put(('laser_output', False))
     
     def update_actual_current(self):
         """Update the actual current display."""
         if self.laser and self.laser.is_connected:
-            try:
-                current = self.laser.get_actual_current()
-                self.actual_current_var.set(f"{current:.1f} mA")
-            except:
-                self.actual_current_var.set("Error")
+            self._laser_executor.submit(self._report_actual_current)
+    
+    def _report_actual_current(self):
+        """Read the actual current and post it to the display (worker thread)."""
+        try:
+            current = self._read_actual_current()
+            self._ui_queue.put(('actual_current', f"{current:.1f} mA"))
+        except Exception:
+            self._ui_queue.put(('actual_current', "Error"))
     
     def take_single_measurement(self):
         """Take a single power measurement."""
@@ -755,40 +875,117 @@ class LaserPowerGUI:
             return
         
         try:
-            self.manual_measurement_active = True
-            self.single_measure_btn.configure(state=tk.DISABLED)
-            
             avg_count = int(self.manual_avg_var.get())
-            power_readings = []
-            
-            for i in range(avg_count):
-                self.power_meter.updatePowerReading(0.2)
-                power = self.power_meter.meterPowerReading
-                power_readings.append(power)
-                time.sleep(0.2)
-            
-            avg_power = sum(power_readings) / len(power_readings)
+        except ValueError:
+            messagebox.showerror("Error", "Invalid averaging value")
+            return
+        
+        self.manual_measurement_active = True
+        self.single_measure_btn.configure(state=tk.DISABLED)
+        
+        # Read the current label on the Tk thread; the worker only does I/O
+        current_str = self.actual_current_var.get().replace(" mA", "")
+        
+        threading.Thread(target=self.run_single_measurement,
+                         args=(avg_count, current_str), daemon=True).start()
+    
+    def run_single_measurement(self, avg_count, current_str):
+        """Take averaged power readings (in background thread)."""
+        try:
+            avg_time = self._configure_averaging(avg_count, 0.2)
+            self.power_meter.updatePowerReading(avg_time)
+            avg_power = self.power_meter.meterPowerReading
             power_mw = avg_power * 1000
+            timestamp = self._now_str()
             
-            # Update display
-            self.optical_power_var.set(f"{power_mw:.3f} mW")
-            
-            # Add to history
-            current_str = self.actual_current_var.get().replace(" mA", "")
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-            
-            self.manual_tree.insert('', 0, values=(current_str, f"{power_mw:.3f}", timestamp))
+            self._ui_queue.put(('measurement', current_str, power_mw, timestamp))
             
         except Exception as e:
-            messagebox.showerror("Error", f"Measurement failed: {str(e)}")
+            self._ui_queue.put(('error', "Error", f"Measurement failed: {str(e)}"))
         
         finally:
-            self.manual_measurement_active = False
-            self.single_measure_btn.configure(state=tk.NORMAL)
+            self._ui_queue.put(('manual_complete',))
+    
+    def _now_str(self):
+        """Return the current time as HH:MM:SS, formatted at most once per second."""
+        t = int(time.time())
+        if t != self._ts_cache[0]:
+            self._ts_cache = (t, datetime.datetime.fromtimestamp(t).strftime("%H:%M:%S"))
+        return self._ts_cache[1]
+    
+    def _configure_averaging(self, n, dt):
+        """
+        Have the power meter average n readings of dt seconds in hardware.
+        
+        Returns:
+            float: Averaging window in seconds to pass to updatePowerReading
+        """
+        avg_time = n * dt
+        if self._hw_average_time != avg_time:
+            self.power_meter.setAverageTime(avg_time)
+            self._hw_average_time = avg_time
+        return avg_time
+    
+    def _queue_update(self, var, value):
+        """Set a Tk variable on the next idle pass, keeping only the latest value."""
+        if not self._pending_updates:
+            self.root.after_idle(self._apply_updates)
+        self._pending_updates[str(var)] = (var, value)
+    
+    def _apply_updates(self):
+        """Apply all Tk variable updates queued since the last idle pass."""
+        pending, self._pending_updates = self._pending_updates, {}
+        for var, value in pending.values():
+            var.set(value)
+    
+    def _drain_ui_queue(self):
+        """Apply updates posted by worker threads (runs on the Tk thread)."""
+        try:
+            while True:
+                try:
+                    item = self._ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                kind = item[0]
+                if kind == 'measurement':
+                    _, current_str, power_mw, timestamp = item
+                    self._queue_update(self.optical_power_var, f"{power_mw:.3f} mW")
+                    item_id = self.manual_tree.insert('', 0, values=(current_str, f"{power_mw:.3f}", timestamp))
+                    self.manual_data.append((current_str, power_mw, timestamp))
+                    self._manual_tree_items.append(item_id)
+                    if len(self._manual_tree_items) > MANUAL_HISTORY_ROWS:
+                        self.manual_tree.delete(self._manual_tree_items.popleft())
+                elif kind == 'manual_complete':
+                    self.manual_measurement_active = False
+                    self.single_measure_btn.configure(state=tk.NORMAL)
+                elif kind == 'sweep_status':
+                    self._queue_update(self.sweep_status_var, item[1])
+                elif kind == 'sweep_row':
+                    self.update_sweep_table_row(item[1], item[2])
+                elif kind == 'progress':
+                    self._queue_update(self.progress_var, item[1])
+                elif kind == 'sweep_complete':
+                    self.sweep_measurement_complete()
+                elif kind == 'actual_current':
+                    self._queue_update(self.actual_current_var, item[1])
+                elif kind == 'laser_output':
+                    self.laser_output_var.set(item[1])
+                elif kind == 'emergency_stopped':
+                    self.laser_output_var.set(False)
+                    self.actual_current_var.set("0.0 mA")
+                    messagebox.showwarning("Emergency Stop", "Laser output disabled and current set to 0")
+                elif kind == 'error':
+                    messagebox.showerror(item[1], item[2])
+        finally:
+            self.root.after(50, self._drain_ui_queue)
     
     def export_sweep_data(self):
         """Export sweep measurement data to CSV."""
-        if not self.sweep_data:
+        if self.sweep_running:
+            messagebox.showwarning("Warning", "Wait for the sweep to finish before exporting")
+            return
+        if not self.sweep_point_count:
             messagebox.showwarning("Warning", "No sweep data to export")
             return
         
@@ -800,23 +997,25 @@ class LaserPowerGUI:
         
         if filename:
             try:
-                with open(filename, 'w', newline='') as csvfile:
-                    fieldnames = ['point', 'target_current_ma', 'actual_current_ma', 
-                                'optical_power_mw', 'timestamp']
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for data in self.sweep_data:
-                        writer.writerow(data)
+                shutil.copyfile(self.sweep_csv_path, filename)
                 
                 messagebox.showinfo("Success", f"Data exported to {filename}")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Export failed: {str(e)}")
     
+    def _remove_sweep_csv(self):
+        """Delete the streamed CSV from the previous sweep, if any."""
+        if self.sweep_csv_path:
+            try:
+                os.remove(self.sweep_csv_path)
+            except OSError:
+                pass
+            self.sweep_csv_path = None
+    
     def export_manual_data(self):
         """Export manual measurement data to CSV."""
-        items = self.manual_tree.get_children()
-        if not items:
+        if not self.manual_data:
             messagebox.showwarning("Warning", "No manual data to export")
             return
         
@@ -828,12 +1027,10 @@ class LaserPowerGUI:
         
         if filename:
             try:
-                with open(filename, 'w', newline='') as csvfile:
+                with open(filename, 'w', newline='', buffering=CSV_BUFFER_SIZE) as csvfile:
                     writer = csv.writer(csvfile)
                     writer.writerow(['Current (mA)', 'Power (mW)', 'Time'])
-                    for item in reversed(items):  # Reverse to get chronological order
-                        values = self.manual_tree.item(item)['values']
-                        writer.writerow(values)
+                    writer.writerows(self.manual_data)
                 
                 messagebox.showinfo("Success", f"Manual data exported to {filename}")
                 
@@ -842,20 +1039,33 @@ class LaserPowerGUI:
     
     def emergency_stop(self):
         """Emergency stop - disable laser immediately."""
+        # Stop any running sweep and abort ramps at their next step, so
+        # whoever holds the laser lock releases it promptly
+        self.sweep_running = False
+        self._ramp_abort.set()
+        
         if self.laser and self.laser.is_connected:
-            try:
+            # Own thread rather than the laser executor, so the stop does not
+            # queue behind pending manual commands
+            threading.Thread(target=self._emergency_stop_worker, daemon=True).start()
+    
+    def _emergency_stop_worker(self):
+        """Disable the laser under the laser lock (background thread)."""
+        try:
+            with self._laser_lock:
                 self.laser.emergency_stop()
-                self.laser_output_var.set(False)
-                self.actual_current_var.set("0.0 mA")
-                messagebox.showwarning("Emergency Stop", "Laser output disabled and current set to 0")
-            except Exception as e:
-                messagebox.showerror("Error", f"Emergency stop failed: {str(e)}")
-        
-        # Stop any running sweep
-        self.sweep_running = False
+                self._last_setpoint_ma = 0
+            self._ui_queue.put(('emergency_stopped',))
+        except Exception as e:
+            self._ui_queue.put(('error', "Error", f"Emergency stop failed: {str(e)}"))
     
     def on_closing(self):
         """Handle application closing."""
+        # Abort running ramps and drop queued manual commands
+        self.sweep_running = False
+        self._ramp_abort.set()
+        self._laser_executor.shutdown(wait=False, cancel_futures=True)
+        
         try:
             # Safe shutdown
             if self.laser and self.laser.is_connected:
@@ -869,11 +1079,19 @@ class LaserPowerGUI:
         except:
             pass
         
+        self._remove_sweep_csv()
         self.root.destroy()
 
 
 def main():
     """Main function to run the GUI."""
+    parser = argparse.ArgumentParser(description="Laser current vs power measurement GUI")
+    parser.add_argument('--verbose', action='store_true',
+                        help="log every sweep point (DEBUG level)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
     root = tk.Tk()
     app = LaserPowerGUI(root)
     
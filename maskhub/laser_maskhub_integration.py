@@ -6,6 +6,7 @@ Integration module for uploading Thorlabs laser measurement data to MaskHub.
 Adapted specifically for CLD1015 pump laser and power meter measurements.
 """
 
+import io
 import json
 import logging
 import pandas as pd
@@ -16,15 +17,36 @@ from dataclasses import dataclass, field
 import threading
 import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from .maskhub_service import MaskHubService, MaskHubConfig, MeasurementData, RunMetadata
-from .maskhub_config import MaskHubConfigManager, MaskHubCredentials
+from .maskhub_config import MaskHubConfigManager, MaskHubCredentials, DATACLASS_SLOTS
 
 # Configure logger
 LOGGER = logging.getLogger(__name__)
 
+# Most measurements the upload worker takes off the queue in one pass
+UPLOAD_BATCH_SIZE = 128
 
-@dataclass
+# Failed uploads are retried in waves of this size, backing off between
+# waves (capped) while MaskHub keeps rejecting them. The wave backoff comes on
+# top of MaskHubService's per-request policy: 5 attempts with 15-16 s waits
+# between them, each up to the request timeout. With the default 30 s timeout
+# one unreachable upload can take about 3.5 minutes before it is re-recorded,
+# and a wave runs UPLOAD_WORKERS such uploads at a time
+RETRY_BATCH_SIZE = 64
+RETRY_MAX_BACKOFF_S = 30
+
+# Concurrent HTTP uploads; each holds one pooled keep-alive connection
+UPLOAD_WORKERS = 6
+
+# Pending uploads held in memory before add_measurement blocks, and how long
+# it blocks before giving up and recording the measurement as failed
+UPLOAD_QUEUE_SIZE = 1024
+UPLOAD_QUEUE_TIMEOUT_S = 30
+
+
+@dataclass(**DATACLASS_SLOTS)
 class LaserMeasurement:
     """Data class for laser measurement data"""
     device_id: str  # e.g., "Laser_1_M01093719" or "Laser_2_M00859480"
@@ -36,10 +58,12 @@ class LaserMeasurement:
     temperature_c: Optional[float] = None
     timestamp: Optional[datetime] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
-    raw_data: Optional[pd.DataFrame] = None
+    # Either a DataFrame or a column-name -> array/list mapping; the mapping
+    # form skips building a DataFrame for small per-measurement traces
+    raw_data: Optional[Union[pd.DataFrame, Dict[str, Any]]] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class LaserRunConfig:
     """Configuration for a laser measurement run"""
     mask_id: int
@@ -52,6 +76,14 @@ class LaserRunConfig:
     project_id: Optional[int] = None
 
 
+@dataclass(**DATACLASS_SLOTS)
+class FailureRecord:
+    """A measurement whose upload failed, kept for retry or saving"""
+    measurement_data: MeasurementData
+    error: str
+    timestamp_ns: int  # time.time_ns() when the failure was recorded
+
+
 class LaserMaskHubIntegration:
     """
     Integration class for uploading laser measurement data to MaskHub
@@ -93,8 +125,12 @@ class LaserMaskHubIntegration:
         self.current_run: Optional[LaserRunConfig] = None
         self.run_id: Optional[str] = None
         self.measurements: List[LaserMeasurement] = []
-        self.upload_queue = queue.Queue()
-        self.failed_uploads: List[Dict] = []
+        self.upload_queue = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        self.failed_uploads: List[FailureRecord] = []
+        # Guards failed_uploads; the upload worker appends while callers retry
+        self._failed_lock = threading.Lock()
+        # Data directories already created by the save thread
+        self._data_dirs: set = set()
         self.upload_stats = {
             'total': 0,
             'successful': 0,
@@ -102,13 +138,27 @@ class LaserMaskHubIntegration:
             'pending': 0
         }
 
-        # Background upload thread
+        # Pool that runs the HTTP uploads of each batch concurrently
+        self.upload_executor = None
+        if self.service:
+            self.upload_executor = ThreadPoolExecutor(
+                max_workers=UPLOAD_WORKERS,
+                thread_name_prefix="MaskHubUpload"
+            )
+
+        # Background upload thread, stopped by queueing None
         self.upload_thread = None
-        self.stop_uploads = threading.Event()
 
         if self.enable_realtime and self.service:
             self._start_upload_thread()
 
+        # Background file-save thread so disk writes stay off the caller
+        self.save_queue = queue.Queue(maxsize=256)
+        self.save_thread = None
+
+        if self.auto_save_data:
+            self._start_save_thread()
+
     def _start_upload_thread(self):
         """Start background thread for uploading measurements"""
         self.upload_thread = threading.Thread(
@@ -119,44 +169,120 @@ class LaserMaskHubIntegration:
         self.upload_thread.start()
         LOGGER.info("Background upload thread started")
 
+    def _start_save_thread(self):
+        """Start background thread for saving measurement data files"""
+        self.save_thread = threading.Thread(
+            target=self._save_worker,
+            daemon=True,
+            name="LaserDataWriter"
+        )
+        self.save_thread.start()
+
+    def _save_worker(self):
+        """Background worker thread writing queued raw data files"""
+        while True:
+            item = self.save_queue.get()
+            try:
+                if item is None:
+                    break
+                self._save_measurement_data(*item)
+            except Exception as e:
+                LOGGER.error(f"Error in save worker: {e}")
+            finally:
+                self.save_queue.task_done()
+
     def _upload_worker(self):
         """Background worker thread for processing upload queue"""
-        while not self.stop_uploads.is_set():
+        stopping = False
+        while not stopping:
+            # Block for the first measurement, then take whatever else is
+            # already queued so bursts are handled as one batch
+            batch = [self.upload_queue.get()]
+            batch.extend(self._drain_queue(UPLOAD_BATCH_SIZE - 1))
             try:
-                # Wait for measurement with timeout
-                measurement_data = self.upload_queue.get(timeout=1.0)
-
-                if self.service:
-                    try:
-                        status_code, result = self.service.upload_measurement(measurement_data)
-
-                        if status_code < 400:
-                            self.upload_stats['successful'] += 1
-                            LOGGER.info(f"Successfully uploaded measurement: {result}")
-                        else:
-                            self.upload_stats['failed'] += 1
-                            self.failed_uploads.append({
-                                'measurement_data': measurement_data,
-                                'error': result,
-                                'timestamp': datetime.now().isoformat()
-                            })
-                            LOGGER.error(f"Failed to upload measurement: {result}")
-
-                    except Exception as e:
-                        self.upload_stats['failed'] += 1
-                        LOGGER.error(f"Exception during upload: {e}")
-                        self.failed_uploads.append({
-                            'measurement_data': measurement_data,
-                            'error': str(e),
-                            'timestamp': datetime.now().isoformat()
-                        })
-
-                self.upload_queue.task_done()
-
-            except queue.Empty:
-                continue
+                # None is the shutdown sentinel. Measurements queued before
+                # or after it are still uploaded, so none are lost unrecorded
+                if None in batch:
+                    stopping = True
+                    batch.extend(self._drain_queue())
+                    measurements = [m for m in batch if m is not None]
+                else:
+                    measurements = batch
+
+                if self.service and measurements:
+                    self._upload_measurements(measurements)
+
             except Exception as e:
                 LOGGER.error(f"Error in upload worker: {e}")
+            finally:
+                for _ in batch:
+                    self.upload_queue.task_done()
+
+    def _drain_queue(self, max_items: Optional[int] = None) -> List[MeasurementData]:
+        """Take up to max_items queued measurements without blocking"""
+        # Pop straight from the queue's deque under its mutex: one lock
+        # acquisition for the whole batch instead of one per get_nowait().
+        # Callers still call task_done() once per item taken.
+        upload_queue = self.upload_queue
+        with upload_queue.mutex:
+            pending = upload_queue.queue
+            count = len(pending) if max_items is None else min(max_items, len(pending))
+            batch = [pending.popleft() for _ in range(count)]
+            if batch:
+                upload_queue.not_full.notify(len(batch))
+        return batch
+
+    def _upload_measurements(self, batch: List[MeasurementData],
+                             show_progress: bool = False,
+                             from_queue: bool = True) -> Dict[str, int]:
+        """
+        Upload a batch of measurements, recording failures and statistics
+
+        Args:
+            batch: Measurements to upload, in order
+            show_progress: Print one progress line per measurement
+            from_queue: Batch came off upload_queue and counts as pending
+
+        Returns:
+            Dictionary with 'successful', 'failed' and 'total' counts
+        """
+        results = {'successful': 0, 'failed': 0, 'total': len(batch)}
+
+        # Requests run concurrently on the pool; results are collected here in
+        # order so statistics and failures are only touched by this thread
+        futures = [self.upload_executor.submit(self.service.upload_measurement, measurement_data)
+                   for measurement_data in batch]
+
+        for i, (measurement_data, future) in enumerate(zip(batch, futures)):
+            if show_progress:
+                print(f"Uploading {i+1}/{len(batch)}: {measurement_data.device_name}")
+
+            try:
+                status_code, result = future.result()
+
+                if status_code < 400:
+                    results['successful'] += 1
+                    LOGGER.debug(f"Successfully uploaded: {measurement_data.device_name}")
+                else:
+                    results['failed'] += 1
+                    self._record_failure(measurement_data, str(result))
+                    LOGGER.error(f"Failed to upload {measurement_data.device_name}: {result}")
+
+            except Exception as e:
+                results['failed'] += 1
+                LOGGER.error(f"Exception uploading {measurement_data.device_name}: {e}")
+                self._record_failure(measurement_data, str(e))
+
+        self.upload_stats['successful'] += results['successful']
+        self.upload_stats['failed'] += results['failed']
+        if from_queue:
+            self.upload_stats['pending'] = max(0, self.upload_stats['pending'] - len(batch))
+        return results
+
+    def _record_failure(self, measurement_data: MeasurementData, error: str):
+        """Park a measurement that could not be uploaded for a later retry"""
+        with self._failed_lock:
+            self.failed_uploads.append(FailureRecord(measurement_data, error, time.time_ns()))
 
     def start_run(self, run_config: LaserRunConfig) -> Optional[str]:
         """
@@ -224,36 +350,67 @@ class LaserMaskHubIntegration:
         # Store measurement locally
         self.measurements.append(measurement)
 
+        # Local-only collection (bench testing without MaskHub) stops here
+        upload = self.service is not None and self.enable_realtime
+        if not upload and (measurement.raw_data is None or not self.auto_save_data):
+            return
+
+        # Serialize raw data once; the same bytes are saved and uploaded
+        raw_bytes = None
+        if measurement.raw_data is not None and (self.auto_save_data or upload):
+            raw_bytes = self._serialize_raw_data(measurement)
+
+        # The file name is fixed now, while run_id still names this run; the
+        # write itself happens later on the save thread
+        data_path = self._raw_data_path(measurement) if raw_bytes is not None else None
+
         # Save raw data if enabled
-        if self.auto_save_data and measurement.raw_data is not None:
-            self._save_measurement_data(measurement)
+        if self.auto_save_data and raw_bytes is not None:
+            self.save_queue.put((data_path, raw_bytes))
 
         # Prepare for MaskHub upload
-        if self.service and self.enable_realtime:
-            self._queue_measurement_upload(measurement, die_position)
+        if upload:
+            self._queue_measurement_upload(measurement, die_position, raw_bytes, data_path)
 
-    def _save_measurement_data(self, measurement: LaserMeasurement):
-        """Save measurement raw data to file"""
-        if measurement.raw_data is None:
-            return
+    def _raw_data_path(self, measurement: LaserMeasurement) -> Path:
+        """Path of the Parquet file holding a measurement's raw data"""
+        timestamp_str = measurement.timestamp.strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        return Path("laser_data", str(self.run_id), f"{measurement.device_id}_{timestamp_str}.parquet")
 
-        # Create data directory
-        data_dir = Path(f"laser_data/{self.run_id}")
-        data_dir.mkdir(parents=True, exist_ok=True)
+    def _serialize_raw_data(self, measurement: LaserMeasurement) -> Optional[bytes]:
+        """Serialize measurement raw data to Parquet bytes in memory"""
+        buffer = io.BytesIO()
+        try:
+            if isinstance(measurement.raw_data, dict):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                pq.write_table(pa.Table.from_pydict(measurement.raw_data), buffer)
+            else:
+                measurement.raw_data.to_parquet(buffer)
+        except Exception as e:
+            LOGGER.error(f"Failed to serialize measurement data: {e}")
+            return None
+        return buffer.getvalue()
+
+    def _save_measurement_data(self, filepath: Path, raw_bytes: bytes):
+        """Save serialized measurement raw data to file"""
+        # Create data directory once per run rather than per measurement
+        data_dir = filepath.parent
+        if data_dir not in self._data_dirs:
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self._data_dirs.add(data_dir)
 
         # Save to parquet file
-        timestamp_str = measurement.timestamp.strftime("%Y%m%d_%H%M%S_%f")[:-3]
-        filename = f"{measurement.device_id}_{timestamp_str}.parquet"
-        filepath = data_dir / filename
-
         try:
-            measurement.raw_data.to_parquet(filepath)
+            filepath.write_bytes(raw_bytes)
             LOGGER.debug(f"Saved measurement data to {filepath}")
         except Exception as e:
             LOGGER.error(f"Failed to save measurement data: {e}")
 
-    def _queue_measurement_upload(self, measurement: LaserMeasurement, die_position: Optional[tuple]):
-        """Queue measurement for upload to MaskHub"""
+    def _queue_measurement_upload(self, measurement: LaserMeasurement, die_position: Optional[tuple],
+                                  raw_bytes: Optional[bytes] = None,
+                                  data_path: Optional[Path] = None):
+        """Queue measurement for upload to MaskHub, attaching serialized raw data if given"""
         if not self.current_run or not self.service:
             return
 
@@ -263,6 +420,8 @@ class LaserMaskHubIntegration:
         else:
             die_x, die_y = 0, 0
 
+        timestamp_iso = measurement.timestamp.isoformat() if measurement.timestamp else None
+
         # Create MaskHub measurement data
         test_meta = {
             'device_id': measurement.device_id,
@@ -270,20 +429,13 @@ class LaserMaskHubIntegration:
             'current_actual_ma': measurement.current_actual_ma,
             'voltage_v': measurement.voltage_v,
             'temperature_c': measurement.temperature_c,
-            'timestamp': measurement.timestamp.isoformat() if measurement.timestamp else None,
+            'timestamp': timestamp_iso,
             **measurement.metadata
         }
 
         if measurement.power_mw is not None:
             test_meta['power_mw'] = measurement.power_mw
 
-        # Prepare raw data path
-        data_path = None
-        if measurement.raw_data is not None and self.auto_save_data:
-            timestamp_str = measurement.timestamp.strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"{measurement.device_id}_{timestamp_str}.parquet"
-            data_path = Path(f"laser_data/{self.run_id}/{filename}")
-
         measurement_data = MeasurementData(
             mask_id=self.current_run.mask_id,
             run_name=self.current_run.run_name,
@@ -296,12 +448,31 @@ class LaserMaskHubIntegration:
             test_station_name=self.current_run.station,
             raw_data_path=data_path or Path("/dev/null"),  # Placeholder if no data
             test_meta=test_meta,
-            timestamp=measurement.timestamp.isoformat() if measurement.timestamp else None
+            timestamp=timestamp_iso,
+            raw_data_bytes=raw_bytes
         )
-
-        # Queue for upload
-        self.upload_queue.put(measurement_data)
         self.upload_stats['total'] += 1
+
+        # Encode the upload form here so the uploader thread only does I/O;
+        # metadata that is not JSON-serializable fails this measurement's
+        # upload rather than the caller
+        try:
+            measurement_data.form_data = MaskHubService.encode_measurement_form(measurement_data)
+        except (TypeError, ValueError) as e:
+            self.upload_stats['failed'] += 1
+            self._record_failure(measurement_data, f"Cannot encode measurement: {e}")
+            LOGGER.error(f"Cannot encode {measurement.device_id} for upload: {e}")
+            return
+
+        # Queue for upload; a full queue means MaskHub is not keeping up, so
+        # block the producer for a while before parking it as failed
+        try:
+            self.upload_queue.put(measurement_data, timeout=UPLOAD_QUEUE_TIMEOUT_S)
+        except queue.Full:
+            self.upload_stats['failed'] += 1
+            self._record_failure(measurement_data, 'Upload queue full')
+            LOGGER.error(f"Upload queue full, deferring {measurement.device_id} to retry")
+            return
         self.upload_stats['pending'] += 1
 
         LOGGER.debug(f"Queued measurement for upload: {measurement.device_id}")
@@ -321,13 +492,7 @@ class LaserMaskHubIntegration:
             return {'successful': 0, 'failed': 0, 'total': 0}
 
         # Collect all measurements from queue
-        batch_measurements = []
-        while not self.upload_queue.empty():
-            try:
-                measurement_data = self.upload_queue.get_nowait()
-                batch_measurements.append(measurement_data)
-            except queue.Empty:
-                break
+        batch_measurements = self._drain_queue()
 
         if not batch_measurements:
             LOGGER.info("No measurements to upload")
@@ -335,40 +500,9 @@ class LaserMaskHubIntegration:
 
         LOGGER.info(f"Starting batch upload of {len(batch_measurements)} measurements")
 
-        results = {'successful': 0, 'failed': 0, 'total': len(batch_measurements)}
-
-        for i, measurement_data in enumerate(batch_measurements):
-            if show_progress:
-                print(f"Uploading {i+1}/{len(batch_measurements)}: {measurement_data.device_name}")
-
-            try:
-                status_code, result = self.service.upload_measurement(measurement_data)
-
-                if status_code < 400:
-                    results['successful'] += 1
-                    LOGGER.debug(f"Successfully uploaded: {measurement_data.device_name}")
-                else:
-                    results['failed'] += 1
-                    self.failed_uploads.append({
-                        'measurement_data': measurement_data,
-                        'error': result,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    LOGGER.error(f"Failed to upload {measurement_data.device_name}: {result}")
-
-            except Exception as e:
-                results['failed'] += 1
-                LOGGER.error(f"Exception uploading {measurement_data.device_name}: {e}")
-                self.failed_uploads.append({
-                    'measurement_data': measurement_data,
-                    'error': str(e),
-                    'timestamp': datetime.now().isoformat()
-                })
-
-        # Update stats
-        self.upload_stats['successful'] += results['successful']
-        self.upload_stats['failed'] += results['failed']
-        self.upload_stats['pending'] = 0
+        results = self._upload_measurements(batch_measurements, show_progress)
+        for _ in batch_measurements:
+            self.upload_queue.task_done()
 
         LOGGER.info(f"Batch upload complete: {results['successful']} successful, {results['failed']} failed")
         return results
@@ -386,7 +520,9 @@ class LaserMaskHubIntegration:
         if not self.current_run:
             raise RuntimeError("No active run to finish")
 
-        # Wait for any pending uploads
+        # Wait for any pending file writes and uploads
+        if self.save_thread:
+            self.save_queue.join()
         if self.enable_realtime:
             self.upload_queue.join()
 
@@ -427,41 +563,50 @@ class LaserMaskHubIntegration:
         """
         Retry all failed uploads
 
+        Blocks for the combined retry budget described at RETRY_BATCH_SIZE
+        while MaskHub is unavailable.
+
         Returns:
             Dictionary with retry statistics
         """
-        if not self.service or not self.failed_uploads:
+        if not self.service:
             return {'retried': 0, 'successful': 0, 'failed': 0}
 
-        LOGGER.info(f"Retrying {len(self.failed_uploads)} failed uploads")
+        # Take the current failures atomically; the upload worker may still be
+        # recording new ones, which stay in failed_uploads for the next retry
+        with self._failed_lock:
+            retry_batch = [failure.measurement_data for failure in self.failed_uploads]
+            self.failed_uploads = []
+        if not retry_batch:
+            return {'retried': 0, 'successful': 0, 'failed': 0}
 
-        results = {'retried': len(self.failed_uploads), 'successful': 0, 'failed': 0}
-        remaining_failures = []
+        LOGGER.info(f"Retrying {len(retry_batch)} failed uploads")
 
-        for failure in self.failed_uploads:
-            measurement_data = failure['measurement_data']
+        results = {'retried': len(retry_batch), 'successful': 0, 'failed': 0}
 
-            try:
-                status_code, result = self.service.upload_measurement(measurement_data)
+        # Anything that fails again is re-recorded by _upload_measurements
+        # Re-encode on upload in case test_meta was corrected since the failure
+        for measurement_data in retry_batch:
+            measurement_data.form_data = None
 
-                if status_code < 400:
-                    results['successful'] += 1
-                    LOGGER.info(f"Retry successful: {measurement_data.device_name}")
-                else:
-                    results['failed'] += 1
-                    remaining_failures.append(failure)
-                    LOGGER.error(f"Retry failed: {measurement_data.device_name} - {result}")
+        backoff_s = 0
+        for start in range(0, len(retry_batch), RETRY_BATCH_SIZE):
+            if backoff_s:
+                LOGGER.info(f"Backing off {backoff_s}s before next retry wave")
+                time.sleep(backoff_s)
 
-            except Exception as e:
-                results['failed'] += 1
-                remaining_failures.append(failure)
-                LOGGER.error(f"Retry exception: {measurement_data.device_name} - {e}")
+            wave = self._upload_measurements(retry_batch[start:start + RETRY_BATCH_SIZE],
+                                             from_queue=False)
+            results['successful'] += wave['successful']
+            results['failed'] += wave['failed']
 
-        # Update failed uploads list
-        self.failed_uploads = remaining_failures
+            # Back off only while MaskHub keeps rejecting whole waves
+            if wave['failed'] and not wave['successful']:
+                backoff_s = min(max(1, backoff_s * 2), RETRY_MAX_BACKOFF_S)
+            else:
+                backoff_s = 0
 
         # Update stats
-        self.upload_stats['successful'] += results['successful']
         self.upload_stats['failed'] = len(self.failed_uploads)
 
         LOGGER.info(f"Retry complete: {results['successful']} successful, {results['failed']} still failed")
@@ -487,20 +632,25 @@ class LaserMaskHubIntegration:
         # Convert measurement data to serializable format
         serializable_failures = []
         for failure in self.failed_uploads:
-            failure_copy = failure.copy()
-            # Convert MeasurementData to dict
-            measurement_data = failure['measurement_data']
-            failure_copy['measurement_data'] = {
-                'mask_id': measurement_data.mask_id,
-                'run_name': measurement_data.run_name,
-                'device_name': measurement_data.device_name,
-                'test_meta': measurement_data.test_meta,
-                'timestamp': measurement_data.timestamp
-            }
-            serializable_failures.append(failure_copy)
-
+            measurement_data = failure.measurement_data
+            serializable_failures.append({
+                'measurement_data': {
+                    'mask_id': measurement_data.mask_id,
+                    'run_name': measurement_data.run_name,
+                    'device_name': measurement_data.device_name,
+                    'test_meta': measurement_data.test_meta,
+                    'timestamp': measurement_data.timestamp
+                },
+                'error': failure.error,
+                'timestamp': datetime.fromtimestamp(failure.timestamp_ns / 1e9).isoformat()
+            })
+
+        # One compact record per line: json.dumps without indent runs on the C
+        # encoder, whereas indent= (or json.dump) falls back to pure Python.
+        # default=str keeps metadata that failed to encode for upload readable.
         with open(filepath, 'w') as f:
-            json.dump(serializable_failures, f, indent=2)
+            f.write("[\n" + ",\n".join(json.dumps(failure, default=str)
+                                         for failure in serializable_failures) + "\n]\n")
 
         LOGGER.info(f"Saved {len(self.failed_uploads)} failed uploads to {filepath}")
 
@@ -508,9 +658,9 @@ class LaserMaskHubIntegration:
         """Clean up resources and stop background threads"""
         if self.upload_thread:
             LOGGER.info("Stopping upload thread...")
-            self.stop_uploads.set()
+            self.upload_queue.put(None)
 
-            # Wait for current uploads to finish
+            # Wait for queued uploads (and the sentinel) to finish
             try:
                 self.upload_queue.join()
             except:
@@ -520,11 +670,28 @@ class LaserMaskHubIntegration:
             self.upload_thread.join(timeout=5)
             if self.upload_thread.is_alive():
                 LOGGER.warning("Upload thread did not stop cleanly")
+            self.upload_thread = None
+
+        if self.save_thread:
+            # Queued files are written before the sentinel is reached
+            self.save_queue.put(None)
+            self.save_thread.join(timeout=5)
+            if self.save_thread.is_alive():
+                LOGGER.warning("Save thread did not stop cleanly")
+            self.save_thread = None
+
+        if self.upload_executor:
+            self.upload_executor.shutdown(wait=True)
+            self.upload_executor = None
 
         # Save any failed uploads
         if self.failed_uploads:
             self.save_failed_uploads()
 
+        # Release the pooled keep-alive connections
+        if self.service:
+            self.service.close()
+
         LOGGER.info("Laser MaskHub integration closed")
 
     def __enter__(self):
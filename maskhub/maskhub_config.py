@@ -6,16 +6,25 @@ Supports loading from environment variables and config files.
 """
 
 import os
+import sys
 import json
 import logging
+from collections import ChainMap
 from pathlib import Path
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, Tuple
+from dataclasses import dataclass
 
 LOGGER = logging.getLogger(__name__)
 
+# Environment variables holding the credentials, in field order
+ENV_VARS = ("MASKHUB_API", "MASKHUB_API_V3", "MASKHUB_API_TOKEN")
 
-@dataclass
+# Slotted dataclasses where the interpreter supports it (Python 3.10+); shared
+# with maskhub_service and laser_maskhub_integration
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class MaskHubCredentials:
     """MaskHub API credentials"""
     api_url: str
@@ -41,26 +50,15 @@ class MaskHubCredentials:
         - MASKHUB_API_V3: V3 API URL
         - MASKHUB_API_TOKEN: API authentication token
         """
-        api_url = os.environ.get("MASKHUB_API")
-        api_v3_url = os.environ.get("MASKHUB_API_V3")
-        api_token = os.environ.get("MASKHUB_API_TOKEN")
+        env = os.environ
+        values = [(name, env.get(name)) for name in ENV_VARS]
+        missing = [name for name, value in values if not value]
         
-        if all([api_url, api_v3_url, api_token]):
-            return cls(
-                api_url=api_url,
-                api_v3_url=api_v3_url,
-                api_token=api_token
-            )
-        else:
-            missing = []
-            if not api_url:
-                missing.append("MASKHUB_API")
-            if not api_v3_url:
-                missing.append("MASKHUB_API_V3")
-            if not api_token:
-                missing.append("MASKHUB_API_TOKEN")
-            LOGGER.warning(f"Missing environment variables: {', '.join(missing)}")
+        if missing:
+            LOGGER.warning("Missing environment variables: %s", ", ".join(missing))
             return None
+        
+        return cls(*(value for _, value in values))
     
     @classmethod
     def from_file(cls, filepath: Path) -> Optional["MaskHubCredentials"]:
@@ -74,28 +72,47 @@ class MaskHubCredentials:
             "api_token": "your-api-token"
         }
         """
-        if not filepath.exists():
-            LOGGER.error(f"Config file not found: {filepath}")
-            return None
-        
         try:
             with open(filepath, 'r') as f:
                 data = json.load(f)
             return cls.from_dict(data)
+        except (FileNotFoundError, IsADirectoryError):
+            LOGGER.error("Config file not found: %s", filepath)
+            return None
         except Exception as e:
-            LOGGER.error(f"Failed to load config from {filepath}: {str(e)}")
+            LOGGER.error("Failed to load config from %s: %s", filepath, e)
             return None
     
     def to_dict(self) -> Dict[str, str]:
         """Convert credentials to dictionary"""
-        return asdict(self)
+        return {
+            "api_url": self.api_url,
+            "api_v3_url": self.api_v3_url,
+            "api_token": self.api_token
+        }
     
     def save_to_file(self, filepath: Path):
         """Save credentials to JSON file"""
         filepath.parent.mkdir(parents=True, exist_ok=True)
         with open(filepath, 'w') as f:
             json.dump(self.to_dict(), f, indent=2)
-        LOGGER.info(f"Saved credentials to {filepath}")
+        LOGGER.info("Saved credentials to %s", filepath)
+
+
+# Example configuration file, serialized once since it never changes
+EXAMPLE_CONFIG_BYTES = json.dumps({
+    "credentials": {
+        "api_url": "https://maskhub.psiquantum.com/api",
+        "api_v3_url": "https://maskhub.psiquantum.com/api/v3",
+        "api_token": "your-api-token-here"
+    },
+    "settings": {
+        "timeout": 30,
+        "max_retries": 5,
+        "retry_multiplier": 2,
+        "retry_min_wait": 15
+    }
+}, indent=2).encode()
 
 
 class MaskHubConfigManager:
@@ -114,6 +131,10 @@ class MaskHubConfigManager:
         "retry_min_wait": 15
     }
     
+    # Parsed config files shared by all managers, keyed by file identity
+    # and modification time so an edited file is parsed again
+    _CONFIG_CACHE: Dict[Tuple[int, int, int, int], Dict] = {}
+    
     def __init__(self, config_path: Optional[Path] = None):
         """
         Initialize configuration manager
@@ -123,36 +144,48 @@ class MaskHubConfigManager:
         """
         self.config_path = config_path
         self.credentials = None
-        self.settings = self.DEFAULT_SETTINGS.copy()
+        # Loaded and updated settings layered over the shared defaults
+        self.settings = ChainMap({}, self.DEFAULT_SETTINGS)
         self._load_configuration()
     
     def _load_configuration(self):
-        """Load configuration from available sources"""
-        # Try environment variables first
-        self.credentials = MaskHubCredentials.from_env()
+        """
+        Load configuration from available sources
         
-        if self.credentials:
-            LOGGER.info("Loaded MaskHub credentials from environment variables")
-            return
+        MASKHUB_CONFIG_SOURCE restricts the sources tried: "env" reads only
+        environment variables (no filesystem access), "file" only config
+        files, and "auto" (default) environment variables then files.
+        """
+        source = os.environ.get("MASKHUB_CONFIG_SOURCE", "auto")
+        
+        # Try environment variables first
+        if source != "file":
+            self.credentials = MaskHubCredentials.from_env()
+            
+            if self.credentials:
+                LOGGER.info("Loaded MaskHub credentials from environment variables")
+                return
+            
+            if source == "env":
+                return
         
         # Try specified config file
-        if self.config_path and self.config_path.exists():
+        if self.config_path:
             config = self._load_full_config(self.config_path)
             if config:
                 self.credentials = config.get("credentials")
                 self.settings.update(config.get("settings", {}))
-                LOGGER.info(f"Loaded MaskHub configuration from {self.config_path}")
+                LOGGER.info("Loaded MaskHub configuration from %s", self.config_path)
                 return
         
         # Try default config locations
         for path in self.DEFAULT_CONFIG_PATHS:
-            if path.exists():
-                config = self._load_full_config(path)
-                if config:
-                    self.credentials = config.get("credentials")
-                    self.settings.update(config.get("settings", {}))
-                    LOGGER.info(f"Loaded MaskHub configuration from {path}")
-                    return
+            config = self._load_full_config(path)
+            if config:
+                self.credentials = config.get("credentials")
+                self.settings.update(config.get("settings", {}))
+                LOGGER.info("Loaded MaskHub configuration from %s", path)
+                return
         
         LOGGER.warning("No MaskHub configuration found")
     
@@ -173,7 +206,21 @@ class MaskHubConfigManager:
                 ...
             }
         }
+
+        Returns None without logging if the file does not exist, so
+        candidate paths can be probed with a single stat(). Files that
+        have not changed since they were last parsed are not reopened.
         """
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = self._CONFIG_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
         try:
             with open(filepath, 'r') as f:
                 data = json.load(f)
@@ -184,12 +231,16 @@ class MaskHubConfigManager:
                 # Assume top-level contains credentials directly
                 credentials = MaskHubCredentials.from_dict(data)
             
-            return {
+            config = {
                 "credentials": credentials,
                 "settings": data.get("settings", {})
             }
+            self._CONFIG_CACHE[key] = config
+            return config
+        except (FileNotFoundError, IsADirectoryError):
+            return None
         except Exception as e:
-            LOGGER.error(f"Failed to load config from {filepath}: {str(e)}")
+            LOGGER.error("Failed to load config from %s: %s", filepath, e)
             return None
     
     def get_credentials(self) -> Optional[MaskHubCredentials]:
@@ -198,7 +249,7 @@ class MaskHubConfigManager:
     
     def get_settings(self) -> Dict[str, Any]:
         """Get configuration settings"""
-        return self.settings.copy()
+        return dict(self.settings)
     
     def set_credentials(self, credentials: MaskHubCredentials):
         """Set credentials programmatically"""
@@ -224,35 +275,20 @@ class MaskHubConfigManager:
         
         config = {
             "credentials": self.credentials.to_dict(),
-            "settings": self.settings
+            "settings": dict(self.settings)
         }
         
         with open(filepath, 'w') as f:
             json.dump(config, f, indent=2)
         
-        LOGGER.info(f"Saved configuration to {filepath}")
+        LOGGER.info("Saved configuration to %s", filepath)
     
     def create_example_config(self, filepath: Optional[Path] = None):
         """Create an example configuration file"""
         filepath = filepath or Path("maskhub_config.example.json")
         
-        example = {
-            "credentials": {
-                "api_url": "https://maskhub.psiquantum.com/api",
-                "api_v3_url": "https://maskhub.psiquantum.com/api/v3",
-                "api_token": "your-api-token-here"
-            },
-            "settings": {
-                "timeout": 30,
-                "max_retries": 5,
-                "retry_multiplier": 2,
-                "retry_min_wait": 15
-            }
-        }
-        
-        with open(filepath, 'w') as f:
-            json.dump(example, f, indent=2)
+        filepath.write_bytes(EXAMPLE_CONFIG_BYTES)
         
-        LOGGER.info(f"Created example configuration at {filepath}")
+        LOGGER.info("Created example configuration at %s", filepath)
         print(f"Example configuration created at {filepath}")
         print("Edit this file with your actual credentials and rename to maskhub_config.json")
\ No newline at end of file
@@ -6,18 +6,15 @@ This file demonstrates how to use the MaskHub service for uploading data.
 
 import logging
 import json
+import uuid
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List
 
-from maskhub_service import (
-    MaskHubService,
-    MaskHubConfig,
-    MeasurementData,
-    RunMetadata,
-    UploadStatus,
-    calculate_file_md5
-)
+# maskhub_service (and requests/tenacity with it) is imported where the
+# service is first used, so the config helpers load without it
 from maskhub_config import MaskHubConfigManager, MaskHubCredentials
 
 # Setup logging
@@ -27,6 +24,15 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger(__name__)
 
+# Required keys of a batch measurement dict, in MeasurementData field order
+_MEASUREMENT_FIELDS = itemgetter(
+    "mask_id", "run_name", "lot_name", "wafer_name", "die_x", "die_y",
+    "device_name", "measurement_type", "test_station_name", "raw_data_path"
+)
+
+# Path objects are immutable, so rows sharing a raw_data_path share one
+_raw_data_path = lru_cache(maxsize=4096)(Path)
+
 
 class EDWAMaskHubUploader:
     """Example class showing how to integrate MaskHub uploads with EDWA"""
@@ -51,6 +57,8 @@ class EDWAMaskHubUploader:
     
     def _initialize_service(self):
         """Initialize MaskHub service with loaded configuration"""
+        from maskhub_service import MaskHubService, MaskHubConfig
+        
         credentials = self.config_manager.get_credentials()
         settings = self.config_manager.get_settings()
         
@@ -85,7 +93,17 @@ class EDWAMaskHubUploader:
         )
         
         self.config_manager.set_credentials(credentials)
-        self._initialize_service()
+        
+        # Same endpoints: only the token changed, so keep the service and
+        # its HTTP connections rather than reconnecting
+        if (self.service
+                and self.service.config.api_url == api_url
+                and self.service.config.api_v3_url == api_v3_url):
+            self.service.set_api_token(api_token)
+        else:
+            if self.service:
+                self.service.close()
+            self._initialize_service()
         LOGGER.info("Credentials configured successfully")
     
     def create_test_run(
@@ -113,6 +131,8 @@ class EDWAMaskHubUploader:
             LOGGER.error("Service not initialized")
             return None
         
+        from maskhub_service import RunMetadata
+        
         metadata = RunMetadata(
             mask_id=mask_id,
             run_name=run_name,
@@ -121,13 +141,13 @@ class EDWAMaskHubUploader:
             expected_measurement_count=expected_measurements,
             test_software_name="edwa",
             test_software_version="1.0.0",
-            uuid=str(datetime.now().timestamp())
+            uuid=uuid.uuid4().hex
         )
         
         run_id = self.service.create_run(metadata)
         if run_id:
             self.current_run_id = run_id
-            LOGGER.info(f"Created run {run_name} with ID {run_id}")
+            LOGGER.info("Created run %s with ID %s", run_name, run_id)
         
         return run_id
     
@@ -168,9 +188,7 @@ class EDWAMaskHubUploader:
             LOGGER.error("Service not initialized")
             return False
         
-        if not raw_data_path.exists():
-            LOGGER.error(f"Data file not found: {raw_data_path}")
-            return False
+        from maskhub_service import MeasurementData
         
         # Prepare measurement data
         measurement = MeasurementData(
@@ -195,14 +213,17 @@ class EDWAMaskHubUploader:
             )
             
             if status_code == 200:
-                LOGGER.info(f"Successfully uploaded measurement ID: {result}")
+                LOGGER.info("Successfully uploaded measurement ID: %s", result)
                 return True
             else:
-                LOGGER.error(f"Upload failed: {result}")
+                LOGGER.error("Upload failed: %s", result)
                 return False
                 
+        except FileNotFoundError:
+            LOGGER.error("Data file not found: %s", raw_data_path)
+            return False
         except Exception as e:
-            LOGGER.error(f"Upload exception: {str(e)}")
+            LOGGER.error("Upload exception: %s", e)
             return False
     
     def upload_batch_measurements(
@@ -224,33 +245,30 @@ class EDWAMaskHubUploader:
             LOGGER.error("Service not initialized")
             return {"success": 0, "failed": 0}
         
-        # Convert dicts to MeasurementData objects
+        from maskhub_service import MeasurementData
+        
+        # Convert dicts to MeasurementData objects; the required fields are
+        # pulled in MeasurementData field order with one itemgetter call
+        default_timestamp = datetime.now().isoformat()
         measurement_objects = []
         for m in measurements:
+            *fields, raw_data_path = _MEASUREMENT_FIELDS(m)
             measurement_objects.append(
                 MeasurementData(
-                    mask_id=m["mask_id"],
-                    run_name=m["run_name"],
-                    lot_name=m["lot_name"],
-                    wafer_name=m["wafer_name"],
-                    die_x=m["die_x"],
-                    die_y=m["die_y"],
-                    device_name=m["device_name"],
-                    measurement_type=m["measurement_type"],
-                    test_station_name=m["test_station_name"],
-                    raw_data_path=Path(m["raw_data_path"]),
+                    *fields,
+                    raw_data_path=_raw_data_path(raw_data_path),
                     test_meta=m.get("test_meta", {}),
-                    timestamp=m.get("timestamp", datetime.now().isoformat())
+                    timestamp=m.get("timestamp", default_timestamp)
                 )
             )
         
-        # Progress callback
+        # Progress callback, printing about every 1% rather than per upload
         def progress_callback(current, total):
-            if show_progress:
-                percent = (current / total) * 100
-                print(f"Upload progress: {current}/{total} ({percent:.1f}%)")
+            step = max(1, total // 100)
+            if current == total or current % step == 0:
+                print(f"Upload progress: {current}/{total} ({current * 100 // total}%)")
         
-        # Upload batch
+        # Upload batch (the service runs the uploads concurrently)
         results = self.service.upload_batch(
             measurement_objects,
             self.current_run_id,
@@ -6,13 +6,18 @@ Extracted and refactored from psiqtest for use in edwa.
 """
 
 import json
+import functools
 import hashlib
 import logging
+import queue
+import sys
+import threading
 from pathlib import Path
 from typing import Dict, Optional, Tuple, Union, Any, List
 from dataclasses import dataclass, field
 from enum import IntEnum
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 from tenacity import (
@@ -24,6 +29,12 @@ from tenacity import (
     RetryError
 )
 
+# Also imported as a top-level module by maskhub_example.py
+try:
+    from .maskhub_config import DATACLASS_SLOTS
+except ImportError:
+    from maskhub_config import DATACLASS_SLOTS
+
 # Configure logger
 LOGGER = logging.getLogger(__name__)
 
@@ -31,6 +42,13 @@ LOGGER = logging.getLogger(__name__)
 SUPREMUM_GOOD_STATUS_CODE = 400
 RETRYABLE_STATUS_CODES = (413, 429, 500, 502, 503, 504)
 RETRYABLE_EXCEPTIONS = (requests.exceptions.ConnectionError,)
+BATCH_UPLOAD_WORKERS = 8  # Concurrent uploads in upload_batch
+HEARTBEAT_QUEUE_SIZE = 256  # Heartbeats waiting to be sent
+_EMPTY_JSON = "{}"  # json.dumps({}), for measurements without meta
+
+# MD5 is only a file checksum here, so let FIPS-mode OpenSSL builds
+# provide it (Python 3.9+ accepts usedforsecurity)
+MD5_KWARGS = {'usedforsecurity': False} if sys.version_info >= (3, 9) else {}
 
 
 class UploadStatus(IntEnum):
@@ -54,7 +72,7 @@ class MaskHubConfig:
     retry_min_wait: int = 15
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class MeasurementData:
     """Data class for measurement information"""
     mask_id: int
@@ -73,9 +91,11 @@ class MeasurementData:
     timestamp: Optional[str] = None
     measurement_status: Optional[str] = None
     extra_meta: Dict[str, Any] = field(default_factory=dict)
+    raw_data_bytes: Optional[bytes] = None  # Uploaded instead of reading raw_data_path
+    form_data: Optional[Dict[str, Any]] = None  # Pre-encoded upload form; reset to None after editing fields
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RunMetadata:
     """Metadata for a test run"""
     mask_id: int
@@ -106,23 +126,64 @@ class MaskHubService:
             config: MaskHub configuration object
         """
         self.config = config
-        self.session = None
-        self._setup_session()
+        # Fixed endpoint URLs, built once rather than per request
+        self._measurements_url = f"{config.api_v3_url}/measurements"
+        self._runs_url = f"{config.api_url}/runs/"
+        self._teststations_url = f"{config.api_url}/teststations/"
+        self._heartbeats_url = f"{config.api_url}/heartbeats/"
+        self._attachments_url = f"{config.api_url}/attachments/"
+        # One session per calling thread, so concurrent uploaders do not
+        # contend on a shared connection pool; all are closed by close()
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+        # Kept for the service's lifetime so its threads (and their
+        # sessions) are reused across batches
+        self._batch_executor: Optional[ThreadPoolExecutor] = None
+        # Test station IDs by name; stations are never renamed or removed
+        self._station_cache: Dict[str, int] = {}
+        # Heartbeats are posted by a background thread, started on first use
+        self._heartbeat_queue = queue.Queue(maxsize=HEARTBEAT_QUEUE_SIZE)
+        self._heartbeat_thread: Optional[threading.Thread] = None
     
-    def _setup_session(self):
+    @property
+    def session(self) -> requests.Session:
+        """Persistent session owned by the calling thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._setup_session()
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+    
+    def _setup_session(self) -> requests.Session:
         """Setup requests session with persistent connection"""
-        self.session = requests.Session()
-        self.session.headers.update({
+        session = requests.Session()
+        session.headers.update({
             "X-API-KEY": self.config.api_token
         })
-        # Connection pooling for better performance
+        # Connection pooling for better performance; all calls go to the one
+        # MaskHub host and each thread has its own session, so a small pool
         adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=10,
+            pool_connections=1,
+            pool_maxsize=4,
             max_retries=0  # We handle retries with tenacity
         )
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def set_api_token(self, api_token: str):
+        """
+        Switch to a new API token, keeping open sessions and connections
+        
+        Args:
+            api_token: New API authentication token
+        """
+        self.config.api_token = api_token
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.headers["X-API-KEY"] = api_token
     
     def _access_resource(
         self, 
@@ -164,7 +225,7 @@ class MaskHubService:
                 try:
                     return response.json(), response.status_code
                 except json.JSONDecodeError as e:
-                    LOGGER.error(f"JSON decoding failed: {str(e)}")
+                    LOGGER.error("JSON decoding failed: %s", e)
                     return response.text, response.status_code
             else:
                 error_msg = f"MaskHub {method} failed for url={url}, status={response.status_code}, response={response.text}"
@@ -172,7 +233,7 @@ class MaskHubService:
                 raise requests.HTTPError(error_msg)
                 
         except requests.RequestException as e:
-            LOGGER.error(f"Request failed: {str(e)}")
+            LOGGER.error("Request failed: %s", e)
             raise
     
     def get_teststation_id(self, name: str) -> Optional[int]:
@@ -185,42 +246,94 @@ class MaskHubService:
         Returns:
             Test station ID or None if failed
         """
+        station_id = self._station_cache.get(name)
+        if station_id is not None:
+            return station_id
+        
         try:
             # Try to get existing test station
             r, status_code = self._access_resource(
-                f"{self.config.api_url}/teststations/",
+                self._teststations_url,
                 "get",
                 {"name": name}
             )
             
             if r and status_code == 200:
                 if len(r) == 1:
-                    return r[0]["id"]
+                    station_id = self._station_cache[name] = r[0]["id"]
+                    return station_id
                 elif len(r) > 1:
                     raise ValueError(f"Multiple test stations found: {r}")
             
             # Create new test station if not found
-            LOGGER.info(f"Test station {name} not found, creating one")
+            LOGGER.info("Test station %s not found, creating one", name)
             r, status_code = self._access_resource(
-                f"{self.config.api_url}/teststations/",
+                self._teststations_url,
                 "post",
                 {"name": name}
             )
-            return r["id"] if r else None
+            if not r:
+                return None
+            station_id = self._station_cache[name] = r["id"]
+            return station_id
             
         except Exception as e:
-            LOGGER.error(f"Failed to get test station id: {str(e)}")
+            LOGGER.error("Failed to get test station id: %s", e)
             return None
     
+    def invalidate_station_cache(self):
+        """Forget cached test station IDs so they are looked up again"""
+        self._station_cache.clear()
+    
     def send_heartbeat(
         self,
         teststation_id: int,
         status: str,
         code: str,
         **kwargs
+    ) -> bool:
+        """
+        Queue a heartbeat to be sent to MaskHub in the background
+        
+        Returns at once; a worker thread posts queued heartbeats in order,
+        so callers on the instrument path never wait on the network. This is
+        fire-and-forget: the server response is not returned and send errors
+        are only logged. Earlier versions returned the response dict (or
+        None); use send_heartbeat_sync() where the response is needed.
+        
+        Args:
+            teststation_id: Test station ID
+            status: Status string
+            code: Code string
+            **kwargs: Additional heartbeat data
+            
+        Returns:
+            True if queued, False if the heartbeat queue is full
+        """
+        heartbeat = {
+            'teststation_id': teststation_id,
+            'status': status,
+            'code': code,
+            **kwargs
+        }
+        
+        self._start_heartbeat_thread()
+        try:
+            self._heartbeat_queue.put_nowait(heartbeat)
+            return True
+        except queue.Full:
+            LOGGER.warning("Heartbeat queue full, dropping heartbeat")
+            return False
+    
+    def send_heartbeat_sync(
+        self,
+        teststation_id: int,
+        status: str,
+        code: str,
+        **kwargs
     ) -> Optional[Dict]:
         """
-        Send heartbeat to MaskHub
+        Send heartbeat to MaskHub and wait for the response
         
         Args:
             teststation_id: Test station ID
@@ -239,16 +352,34 @@ class MaskHubService:
         }
         
         try:
-            response, _ = self._access_resource(
-                f"{self.config.api_url}/heartbeats/",
-                "post",
-                heartbeat
-            )
+            response, _ = self._access_resource(self._heartbeats_url, "post", heartbeat)
             return response
         except Exception as e:
-            LOGGER.error(f"Failed to send heartbeat: {str(e)}")
+            LOGGER.error("Failed to send heartbeat: %s", e)
             return None
     
+    def _start_heartbeat_thread(self):
+        """Start the heartbeat worker on first use"""
+        with self._sessions_lock:
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(
+                    target=self._heartbeat_worker,
+                    name="MaskHubHeartbeat",
+                    daemon=True
+                )
+                self._heartbeat_thread.start()
+    
+    def _heartbeat_worker(self):
+        """Post queued heartbeats until the None sentinel"""
+        while True:
+            heartbeat = self._heartbeat_queue.get()
+            if heartbeat is None:
+                break
+            try:
+                self._access_resource(self._heartbeats_url, "post", heartbeat)
+            except Exception as e:
+                LOGGER.error("Failed to send heartbeat: %s", e)
+    
     def create_run(self, metadata: RunMetadata) -> Optional[int]:
         """
         Create a new run in MaskHub
@@ -289,17 +420,17 @@ class MaskHubService:
             
             # Create run
             r_run, _ = self._access_resource(
-                f"{self.config.api_url}/runs/",
+                self._runs_url,
                 "post",
                 payload
             )
             
             run_id = r_run["id"]
-            LOGGER.info(f"Created run {metadata.run_name} with ID {run_id}")
+            LOGGER.info("Created run %s with ID %s", metadata.run_name, run_id)
             return run_id
             
         except Exception as e:
-            LOGGER.error(f"Failed to create run: {str(e)}")
+            LOGGER.error("Failed to create run: %s", e)
             return None
     
     def _retryable_result(self, result: Tuple[int, Union[int, str]]) -> bool:
@@ -307,12 +438,6 @@ class MaskHubService:
         status_code, _ = result
         return status_code in RETRYABLE_STATUS_CODES
     
-    @retry(
-        stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=2, min=15),
-        retry=(retry_if_exception_type(RETRYABLE_EXCEPTIONS) | 
-               retry_if_result(lambda r: r[0] in RETRYABLE_STATUS_CODES))
-    )
     def upload_measurement(
         self,
         measurement: MeasurementData,
@@ -328,7 +453,51 @@ class MaskHubService:
         Returns:
             Tuple of (status_code, measurement_id or error_message)
         """
-        # Prepare data payload
+        # Use the producer's pre-encoded form if it set one; otherwise encode
+        # here. Either way the form is shared only by this call's retries,
+        # so later edits to the measurement are picked up on the next call
+        data = measurement.form_data
+        if data is None:
+            data = self.encode_measurement_form(measurement)
+        return self._upload_measurement_form(measurement, data)
+    
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=2, min=15),
+        retry=(retry_if_exception_type(RETRYABLE_EXCEPTIONS) | 
+               retry_if_result(lambda r: r[0] in RETRYABLE_STATUS_CODES))
+    )
+    def _upload_measurement_form(
+        self,
+        measurement: MeasurementData,
+        data: Dict[str, Any]
+    ) -> Tuple[int, Union[int, str]]:
+        """POST an encoded measurement form, retrying transient failures"""
+        # Upload file, from memory when the caller already has the bytes
+        try:
+            if measurement.raw_data_bytes is not None:
+                return self._post_measurement(measurement, data, measurement.raw_data_bytes)
+            with open(measurement.raw_data_path, "rb") as f:
+                return self._post_measurement(measurement, data, f)
+                    
+        except Exception as e:
+            LOGGER.error("Upload exception: %s", e)
+            raise
+    
+    @staticmethod
+    def encode_measurement_form(measurement: MeasurementData) -> Dict[str, Any]:
+        """
+        Encode the multipart form fields for a measurement upload
+        
+        Producers can call this when queueing a measurement so the JSON
+        encoding happens on their thread rather than the uploader's.
+        
+        Args:
+            measurement: Measurement data to encode
+            
+        Returns:
+            Form field dict with test_meta and meta as JSON strings
+        """
         data = {
             "mask_id": measurement.mask_id,
             "run_name": measurement.run_name,
@@ -348,45 +517,57 @@ class MaskHubService:
         elif measurement.extra_meta:
             data["meta"] = json.dumps(measurement.extra_meta)
         else:
-            data["meta"] = json.dumps({})
+            data["meta"] = _EMPTY_JSON
+        return data
+    
+    def _post_measurement(
+        self,
+        measurement: MeasurementData,
+        data: Dict[str, Any],
+        raw_data: Any
+    ) -> Tuple[int, Union[int, str]]:
+        """
+        POST one measurement form with its raw data attached
         
-        # Upload file
-        try:
-            with open(measurement.raw_data_path, "rb") as f:
-                files = {"raw_data": (measurement.raw_data_path.name, f)}
-                
-                response = self.session.post(
-                    f"{self.config.api_v3_url}/measurements",
-                    data=data,
-                    files=files,
-                    timeout=self.config.timeout
-                )
-                
-                if response.status_code == 200:
-                    payload = response.json()
-                    measurement_id = payload["id"]
-                    LOGGER.info(
-                        f"Uploaded measurement: {measurement.wafer_name} "
-                        f"({measurement.die_x}, {measurement.die_y}) {measurement.device_name}"
-                    )
-                    return response.status_code, measurement_id
-                else:
-                    try:
-                        payload = response.json()
-                        error_msg = payload.get("message", "Unknown error")
-                    except json.JSONDecodeError:
-                        error_msg = response.text
-                    
-                    LOGGER.error(
-                        f"Upload failed: {measurement.wafer_name} "
-                        f"({measurement.die_x}, {measurement.die_y}) {measurement.device_name} - "
-                        f"[{response.status_code}] {error_msg}"
-                    )
-                    return response.status_code, error_msg
-                    
-        except Exception as e:
-            LOGGER.error(f"Upload exception: {str(e)}")
-            raise
+        Args:
+            measurement: Measurement being uploaded
+            data: Form fields
+            raw_data: Raw data as bytes or an open binary file
+            
+        Returns:
+            Tuple of (status_code, measurement_id or error_message)
+        """
+        files = {"raw_data": (measurement.raw_data_path.name, raw_data)}
+        
+        response = self.session.post(
+            self._measurements_url,
+            data=data,
+            files=files,
+            timeout=self.config.timeout
+        )
+        
+        if response.status_code == 200:
+            payload = response.json()
+            measurement_id = payload["id"]
+            LOGGER.info(
+                "Uploaded measurement: %s (%s, %s) %s",
+                measurement.wafer_name, measurement.die_x, measurement.die_y,
+                measurement.device_name
+            )
+            return response.status_code, measurement_id
+        else:
+            try:
+                payload = response.json()
+                error_msg = payload.get("message", "Unknown error")
+            except json.JSONDecodeError:
+                error_msg = response.text
+            
+            LOGGER.error(
+                "Upload failed: %s (%s, %s) %s - [%s] %s",
+                measurement.wafer_name, measurement.die_x, measurement.die_y,
+                measurement.device_name, response.status_code, error_msg
+            )
+            return response.status_code, error_msg
     
     def upload_batch(
         self,
@@ -407,26 +588,47 @@ class MaskHubService:
         """
         results = {"success": [], "failed": []}
         total = len(measurements)
+        if not total:
+            return results
         
-        for i, measurement in enumerate(measurements):
+        # Uploads are network-bound, so run them concurrently; each pool
+        # thread uses its own session (see the session property)
+        executor = self._get_batch_executor()
+        futures = {
+            executor.submit(self.upload_measurement, measurement, run_id): measurement
+            for measurement in measurements
+        }
+        
+        for done, future in enumerate(as_completed(futures), start=1):
+            measurement = futures[future]
             try:
-                status_code, result = self.upload_measurement(measurement, run_id)
+                status_code, result = future.result()
                 if status_code == 200:
                     results["success"].append(measurement)
                 else:
                     results["failed"].append(measurement)
             except RetryError:
-                LOGGER.error(f"Max retries exceeded for {measurement.device_name}")
+                LOGGER.error("Max retries exceeded for %s", measurement.device_name)
                 results["failed"].append(measurement)
             except Exception as e:
-                LOGGER.error(f"Unexpected error: {str(e)}")
+                LOGGER.error("Unexpected error: %s", e)
                 results["failed"].append(measurement)
             
             if progress_callback:
-                progress_callback(i + 1, total)
+                progress_callback(done, total)
         
         return results
     
+    def _get_batch_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for upload_batch, created on first use"""
+        with self._sessions_lock:
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(
+                    max_workers=BATCH_UPLOAD_WORKERS,
+                    thread_name_prefix="MaskHubBatch"
+                )
+            return self._batch_executor
+    
     def trigger_die_analysis(self, run_name: str) -> bool:
         """
         Trigger die analysis for a completed run
@@ -444,16 +646,17 @@ class MaskHubService:
             )
             
             if response.status_code == 200:
-                LOGGER.info(f"Triggered die analysis for run {run_name}")
+                LOGGER.info("Triggered die analysis for run %s", run_name)
                 return True
             else:
                 LOGGER.error(
-                    f"Failed to trigger die analysis: [{response.status_code}] {response.text}"
+                    "Failed to trigger die analysis: [%s] %s",
+                    response.status_code, response.text
                 )
                 return False
                 
         except Exception as e:
-            LOGGER.error(f"Exception triggering die analysis: {str(e)}")
+            LOGGER.error("Exception triggering die analysis: %s", e)
             return False
     
     def post_attachment(
@@ -473,14 +676,10 @@ class MaskHubService:
         Returns:
             True if successful, False otherwise
         """
-        if not filepath.exists():
-            LOGGER.error(f"File does not exist: {filepath}")
-            return False
-        
         try:
             with open(filepath, "rb") as f:
                 response = self.session.post(
-                    f"{self.config.api_url}/attachments/",
+                    self._attachments_url,
                     data={
                         "target_model_name": "run",
                         "target_model_id": run_id,
@@ -491,23 +690,45 @@ class MaskHubService:
                 )
                 
                 if response.status_code < SUPREMUM_GOOD_STATUS_CODE:
-                    LOGGER.info(f"Successfully uploaded attachment: {filepath.name}")
+                    LOGGER.info("Successfully uploaded attachment: %s", filepath.name)
                     return True
                 else:
                     LOGGER.error(
-                        f"Failed to upload attachment: [{response.status_code}] {response.text}"
+                        "Failed to upload attachment: [%s] %s",
+                        response.status_code, response.text
                     )
                     return False
                     
+        except FileNotFoundError:
+            LOGGER.error("File does not exist: %s", filepath)
+            return False
         except Exception as e:
-            LOGGER.error(f"Exception uploading attachment: {str(e)}")
+            LOGGER.error("Exception uploading attachment: %s", e)
             return False
     
     def close(self):
-        """Close the session and clean up resources"""
-        if self.session:
-            self.session.close()
-            self.session = None
+        """Close all thread sessions and clean up resources"""
+        if self._heartbeat_thread is not None:
+            # Unsent heartbeats are stale by now; drop them so shutdown waits
+            # for at most the post already in flight
+            try:
+                while True:
+                    self._heartbeat_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._heartbeat_queue.put(None)
+            self._heartbeat_thread.join(timeout=self.config.timeout + 5)
+            if self._heartbeat_thread.is_alive():
+                LOGGER.warning("Heartbeat thread did not stop cleanly")
+            self._heartbeat_thread = None
+        if self._batch_executor is not None:
+            self._batch_executor.shutdown(wait=True)
+            self._batch_executor = None
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+        self._local = threading.local()
     
     def __enter__(self):
         """Context manager entry"""
@@ -522,14 +743,27 @@ def calculate_file_md5(filepath: Path) -> str:
     """
     Calculate MD5 hash of a file
     
+    The digest is cached by path, modification time and size, so a file
+    that is hashed again unchanged (e.g. on an upload retry) is not reread.
+    
     Args:
         filepath: Path to file
         
     Returns:
         MD5 hash string
     """
-    hasher = hashlib.md5()
-    with open(filepath, "rb") as f:
-        while chunk := f.read(8192):
+    st = Path(filepath).stat()
+    return _md5_cached(str(filepath), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=1024)
+def _md5_cached(path: str, mtime_ns: int, size: int) -> str:
+    """Hash a file; mtime_ns and size only key the cache"""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: reads into a reusable buffer without holding the GIL
+            return hashlib.file_digest(f, lambda: hashlib.md5(**MD5_KWARGS)).hexdigest()
+        hasher = hashlib.md5(**MD5_KWARGS)
+        while chunk := f.read(1 << 20):
             hasher.update(chunk)
-    return hasher.hexdigest()
\ No newline at end of file
+    return hasher.hexdigest()
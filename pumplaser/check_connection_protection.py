@@ -8,34 +8,38 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from pump_laser import CLD1015
 
-def main():
-    device_address = "USB0::0x1313::0x804F::M01093719::0::INSTR"
+def check_connection_protection(cld):
+    """Report the protection modes and the current trip and output state."""
+    print("CONNECTION PROTECTION ANALYSIS")
+    print("=" * 50)
 
-    try:
-        with CLD1015(device_address) as cld:
-            print("CONNECTION PROTECTION ANALYSIS")
-            print("=" * 50)
+    # Check if connection protection can be disabled
+    protection_commands = [
+        ("Connection protection mode", "OUTP:PROT:CONN:MODE?"),
+        ("Temperature protection mode", "OUTP:PROT:TEMP:MODE?"),
+    ]
 
-            # Check if connection protection can be disabled
-            protection_commands = [
-                ("Connection protection mode", "OUTP:PROT:CONN:MODE?"),
-                ("Temperature protection mode", "OUTP:PROT:TEMP:MODE?"),
-            ]
+    for name, cmd in protection_commands:
+        try:
+            result = cld.instrument.query(cmd).strip()
+            print(f"{name}: {result}")
+        except Exception as e:
+            print(f"{name}: Not available - {e}")
 
-            for name, cmd in protection_commands:
-                try:
-                    result = cld.instrument.query(cmd).strip()
-                    print(f"{name}: {result}")
-                except Exception as e:
-                    print(f"{name}: Not available - {e}")
+    # Check if we can get more details about the connection
+    print(f"\nCurrent protection status:")
+    print(f"Connection failure: {cld.instrument.query('OUTP:PROT:CONN:TRIP?').strip()}")
 
-            # Check if we can get more details about the connection
-            print(f"\nCurrent protection status:")
-            print(f"Connection failure: {cld.instrument.query('OUTP:PROT:CONN:TRIP?').strip()}")
+    # Try to see if there are any settings we can adjust
+    print(f"\nOutput condition: {cld.instrument.query('OUTP:COND?').strip()}")
+    print(f"Output state: {cld.instrument.query('OUTP:STAT?').strip()}")
 
-            # Try to see if there are any settings we can adjust
-            print(f"\nOutput condition: {cld.instrument.query('OUTP:COND?').strip()}")
-            print(f"Output state: {cld.instrument.query('OUTP:STAT?').strip()}")
+def main():
+    device_address = "USB0::0x1313::0x804F::M01093719::0::INSTR"
+
+    try:
+        with CLD1015(device_address) as cld:
+            check_connection_protection(cld)
 
             # Check if there's a way to set connection protection mode
             try:
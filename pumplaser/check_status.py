@@ -8,19 +8,23 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from pump_laser import CLD1015
 
+def print_status(cld):
+    """Print the CLD1015 status report."""
+    print("CLD1015 Status Report")
+    print("=" * 40)
+
+    status = cld.get_status()
+
+    for key, value in status.items():
+        print(f"{key:25}: {value}")
+
 def main():
     """Check CLD1015 status."""
     device_address = "USB0::0x1313::0x804F::M01093719::0::INSTR"
 
     try:
         with CLD1015(device_address) as cld:
-            print("CLD1015 Status Report")
-            print("=" * 40)
-
-            status = cld.get_status()
-
-            for key, value in status.items():
-                print(f"{key:25}: {value}")
+            print_status(cld)
 
     except Exception as e:
         print(f"Error: {e}")
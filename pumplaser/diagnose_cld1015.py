@@ -11,35 +11,50 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from pump_laser import CLD1015
 
+def query_checks(cld, checks):
+    """
+    Query (label, command) pairs and return (label, response) pairs.
+
+    All commands go out as one compound SCPI query, i.e. one USB round trip.
+    If that fails or returns the wrong number of values (e.g. one sub-command
+    is unsupported), each command is queried on its own instead.
+    """
+    try:
+        response = cld.instrument.query(";:".join(cmd for _, cmd in checks))
+        values = [v.strip() for v in response.strip().split(";")]
+        if len(values) == len(checks):
+            return [(name, value) for (name, _), value in zip(checks, values)]
+        print(f"Expected {len(checks)} values from compound query, got "
+              f"{len(values)}: {response.strip()!r}")
+    except Exception as e:
+        print(f"Compound query failed: {e}")
+
+    print("Querying one command at a time")
+    results = []
+    for name, cmd in checks:
+        try:
+            results.append((name, cld.instrument.query(cmd).strip()))
+        except Exception as e:
+            results.append((name, f"Error - {e}"))
+    return results
+
 def check_protections(cld):
     """Check all protection circuits and interlocks."""
     print("\n" + "=" * 60)
     print("PROTECTION AND INTERLOCK STATUS")
     print("=" * 60)
 
-    try:
-        # Check interlock circuit
-        interlock = cld.instrument.query("OUTP:PROT:INTL:TRIP?").strip()
-        print(f"Interlock circuit tripped: {interlock}")
-
-        # Check keylock
-        keylock = cld.instrument.query("OUTP:PROT:KEYL:TRIP?").strip()
-        print(f"Keylock protection tripped: {keylock}")
-
-        # Check over temperature
-        overtemp = cld.instrument.query("OUTP:PROT:OTEM:TRIP?").strip()
-        print(f"Over temperature tripped: {overtemp}")
-
-        # Check connection failure
-        connection = cld.instrument.query("OUTP:PROT:CONN:TRIP?").strip()
-        print(f"Connection failure tripped: {connection}")
-
-        # Check output condition
-        condition = cld.instrument.query("OUTP:COND?").strip()
-        print(f"Output condition: {condition}")
+    # All trip flags and the output condition
+    checks = [
+        ("Interlock circuit tripped", "OUTP:PROT:INTL:TRIP?"),
+        ("Keylock protection tripped", "OUTP:PROT:KEYL:TRIP?"),
+        ("Over temperature tripped", "OUTP:PROT:OTEM:TRIP?"),
+        ("Connection failure tripped", "OUTP:PROT:CONN:TRIP?"),
+        ("Output condition", "OUTP:COND?"),
+    ]
 
-    except Exception as e:
-        print(f"Error checking protections: {e}")
+    for name, value in query_checks(cld, checks):
+        print(f"{name}: {value}")
 
 def check_operating_conditions(cld):
     """Check various operating conditions."""
@@ -47,28 +62,27 @@ def check_operating_conditions(cld):
     print("OPERATING CONDITIONS")
     print("=" * 60)
 
-    try:
-        # Check if we're in the right operating mode
-        mode = cld.instrument.query("SOUR:FUNC:MODE?").strip()
-        print(f"Operating mode: {mode}")
-
-        # Check current limit
-        limit = float(cld.instrument.query("SOUR:CURR:LIM:AMPL?"))
-        print(f"Current limit: {limit*1000:.1f} mA")
-
-        # Check if limit is tripped
-        limit_trip = cld.instrument.query("SOUR:CURR:LIM:TRIP?").strip()
-        print(f"Current limit tripped: {limit_trip}")
+    # Operating mode, current limit and limit trip
+    checks = [
+        ("Operating mode", "SOUR:FUNC:MODE?"),
+        ("Current limit", "SOUR:CURR:LIM:AMPL?"),
+        ("Current limit tripped", "SOUR:CURR:LIM:TRIP?"),
+    ]
 
-        # Check LD polarity if supported
-        try:
-            polarity = cld.instrument.query("OUTP:POL?").strip()
-            print(f"LD polarity: {polarity}")
-        except:
-            print("LD polarity: Not supported or not readable")
+    for name, value in query_checks(cld, checks):
+        if name == "Current limit":
+            try:
+                value = f"{float(value)*1000:.1f} mA"
+            except ValueError:
+                pass
+        print(f"{name}: {value}")
 
-    except Exception as e:
-        print(f"Error checking operating conditions: {e}")
+    # Check LD polarity if supported
+    try:
+        polarity = cld.instrument.query("OUTP:POL?").strip()
+        print(f"LD polarity: {polarity}")
+    except:
+        print("LD polarity: Not supported or not readable")
 
 def check_measurement_subsystem(cld):
     """Check measurement capabilities."""
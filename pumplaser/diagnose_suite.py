@@ -0,0 +1,44 @@
+"""
+CLD1015 Diagnostic Suite
+
+Runs the read-only checks from check_status.py, diagnose_cld1015.py and
+check_connection_protection.py over a single VISA session, instead of
+opening the instrument once per script. Nothing is written to the device.
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pump_laser import CLD1015
+from check_status import print_status
+from check_connection_protection import check_connection_protection
+from diagnose_cld1015 import (
+    check_protections,
+    check_operating_conditions,
+    check_measurement_subsystem,
+)
+
+def main():
+    """Run all read-only CLD1015 checks on one connection."""
+    device_address = "USB0::0x1313::0x804F::M01093719::0::INSTR"
+
+    try:
+        with CLD1015(device_address) as cld:
+            print(f"Connected to: {cld.get_identity()}\n")
+
+            print_status(cld)
+            check_protections(cld)
+            check_operating_conditions(cld)
+            check_measurement_subsystem(cld)
+
+            print()
+            check_connection_protection(cld)
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
@@ -14,25 +14,42 @@ Features:
 import os
 import sys
 import pathlib
-import glob
 import time
 import csv
 import datetime
 import threading
 import queue
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, List, Tuple
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import pyvisa
 
+_HERE = pathlib.Path(__file__).resolve().parent
+
 # Add modules to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Python-Driver-for-Thorlabs-power-meter'))
-sys.path.extend(glob.glob(f'{pathlib.Path(__file__).parent.parent.resolve()}/Python-Driver-for-Thorlabs-power-meter/*/**/', recursive=True))
+sys.path.insert(0, str(_HERE.parent))
+from thorlabs_driver_path import DRIVER_DIR as _DRIVER_DIR, add_driver_paths
+add_driver_paths()
 
 # Import laser and power meter modules
 from pump_laser import CLD1015, list_visa_resources
 from ThorlabsPowerMeter import ThorlabsPowerMeter
 
+SCAN_FIELDNAMES = ['timestamp', 'laser', 'current_set_mA', 'current_actual_mA',
+                   'voltage_V', 'power_mW']
+
+# Scan rows are written and flushed in chunks of this many points
+SCAN_FLUSH_EVERY = 64
+
+# Longest the scan waits on the CSV writer thread (queue put / final join)
+SCAN_WRITER_TIMEOUT_S = 10
+
+# Thorlabs DLL folder; the driver expects a trailing separator
+DLL_PATH = os.path.join(_DRIVER_DIR, 'Thorlabs_DotNet_dll', '')
+
 
 class LaserControlPanel(ttk.LabelFrame):
     """Control panel for a single laser with safety features."""
@@ -446,7 +463,13 @@ class DualLaserControlGUI:
         # Scanning state
         self.scan_running = False
         self.scan_thread = None
-        self.scan_data = []
+        # Scan rows are streamed to scan_csv_path; only summary stats stay in memory
+        self.scan_csv_path = None
+        self.scan_point_count = 0
+        self.scan_power_min = None
+        self.scan_power_max = None
+        # Exception that stopped the CSV writer thread, checked by the scan loop
+        self.scan_write_error = None
 
         # Update timer
         self.update_timer = None
@@ -681,10 +704,7 @@ class DualLaserControlGUI:
             # Connect
             try:
                 # Try to connect to power meter
-                dll_path = os.path.join(os.path.dirname(__file__), '..',
-                                       'Python-Driver-for-Thorlabs-power-meter',
-                                       'Thorlabs_DotNet_dll', '')
-                deviceList = ThorlabsPowerMeter.listDevices(libraryPath=dll_path)
+                deviceList = ThorlabsPowerMeter.listDevices(libraryPath=DLL_PATH)
 
                 if deviceList.resourceCount > 0:
                     self.power_meter = deviceList.connect(deviceList.resourceName[0])
@@ -741,6 +761,10 @@ class DualLaserControlGUI:
 
     def start_scan(self):
         """Start parameter scan."""
+        # A stopped scan still owns the CSV until its thread finishes
+        if self.scan_thread and self.scan_thread.is_alive():
+            return
+
         # Verify at least one laser is connected
         laser_selection = self.scan_laser_var.get()
 
@@ -764,7 +788,11 @@ class DualLaserControlGUI:
 
         self.scan_running = True
         self.scan_btn.config(text="Stop Scan")
-        self.scan_data = []
+        self.export_btn.config(state='disabled')
+        self._remove_scan_csv()
+        self.scan_point_count = 0
+        self.scan_power_min = None
+        self.scan_power_max = None
 
         # Clear previous results
         for item in self.results_tree.get_children():
@@ -776,12 +804,19 @@ class DualLaserControlGUI:
         self.scan_thread.start()
 
     def stop_scan(self):
-        """Stop ongoing scan."""
+        """Ask the scan thread to stop after the current point."""
+        self.scan_running = False
+        # Export and restart wait for _scan_finished: the scan thread may
+        # still be mid-point with rows not yet written to the CSV
+        self.scan_btn.config(text="Stopping...", state='disabled')
+        self.status_bar.config(text="Stopping scan...")
+
+    def _scan_finished(self):
+        """Re-enable scan controls once the scan thread has closed the CSV."""
         self.scan_running = False
-        self.scan_btn.config(text="Start Scan")
-        if len(self.scan_data) > 0:
+        self.scan_btn.config(text="Start Scan", state='normal')
+        if self.scan_point_count > 0:
             self.export_btn.config(state='normal')
-        self.status_bar.config(text="Scan stopped")
 
     def _run_scan(self):
         """Execute the scan sequence."""
@@ -808,81 +843,187 @@ class DualLaserControlGUI:
                 if self.laser2_panel.is_connected:
                     lasers_to_scan.append(("Laser 2", self.laser2_panel))
 
-            # Perform scan
-            for laser_name, laser_panel in lasers_to_scan:
-                if not self.scan_running:
-                    break
-
-                # Ensure output is enabled
-                if not laser_panel.laser.get_ld_output_state():
-                    laser_panel.laser.set_ld_output(True)
-                    laser_panel.output_var.set(True)
-                    laser_panel.update_output_indicator(True)
-                    time.sleep(0.5)  # Allow output to stabilize
-
-                for current_ma in current_points:
-                    if not self.scan_running:
-                        break
-
-                    # Set current
-                    laser_panel.laser.set_ld_current(current_ma)
-                    self.root.after(0, lambda c=current_ma: laser_panel.current_var.set(c))
-
-                    # Update status
-                    self.root.after(0, lambda: self.status_bar.config(
-                        text=f"Scanning {laser_name}: {current_ma:.1f} mA"))
-
-                    # Wait for settling
-                    time.sleep(delay)
-
-                    # Take measurements
-                    actual_current = laser_panel.laser.get_ld_current_actual()
-                    voltage = laser_panel.laser.get_ld_voltage()
-
-                    power = 0
-                    if self.power_meter_connected and self.power_meter:
-                        try:
-                            self.power_meter.updatePowerReading(0.1)
-                            power = self.power_meter.power * 1000  # Convert to mW
-                        except:
-                            pass
-
-                    # Store data
-                    data_point = {
-                        'laser': laser_name,
-                        'current_set': current_ma,
-                        'current_actual': actual_current,
-                        'voltage': voltage,
-                        'power': power,
-                        'timestamp': datetime.datetime.now()
-                    }
-                    self.scan_data.append(data_point)
-
-                    # Update display
-                    self.root.after(0, lambda dp=data_point: self._add_result_to_tree(dp))
-
-                # Return to safe current after scan
-                if self.scan_running:
-                    laser_panel.laser.set_ld_current(100)
-                    self.root.after(0, lambda: laser_panel.current_var.set(100))
-
-            self.root.after(0, lambda: self.stop_scan())
-            self.root.after(0, lambda: self.status_bar.config(text="Scan completed"))
+            # Point timestamps are offsets on the monotonic clock from one
+            # wall-clock anchor, so they stay ordered if the system clock steps
+            epoch0, t0 = time.time(), time.monotonic()
+
+            # Perform scan, streaming each point to disk as it is measured
+            fd, self.scan_csv_path = tempfile.mkstemp(prefix='laser_scan_', suffix='.csv')
+            with open(fd, 'w', newline='', buffering=1 << 20) as csvfile, \
+                    ThreadPoolExecutor(max_workers=1) as pool:
+                # Rows are written on a separate thread so disk I/O overlaps
+                # the next point's settling and measurement
+                scan_rows = queue.Queue(maxsize=256)
+                self.scan_write_error = None
+                writer_thread = threading.Thread(target=self._scan_writer_loop,
+                                                 args=(csvfile, scan_rows), daemon=True)
+                writer_thread.start()
+                try:
+                    self._scan_lasers(lasers_to_scan, current_points, delay,
+                                      epoch0, t0, pool, scan_rows)
+                finally:
+                    # A failed writer keeps draining the queue, so these
+                    # timeouts only guard against a writer that is stuck
+                    try:
+                        scan_rows.put(None, timeout=SCAN_WRITER_TIMEOUT_S)
+                    except queue.Full:
+                        pass
+                    writer_thread.join(SCAN_WRITER_TIMEOUT_S)
+
+            if self.scan_write_error is not None:
+                raise IOError(f"Writing scan data failed: {self.scan_write_error}")
+
+            if self.scan_point_count:
+                summary = (f"Scan completed - {self.scan_point_count} points, "
+                           f"power {self.scan_power_min:.3f}-{self.scan_power_max:.3f} mW")
+            else:
+                summary = "Scan completed"
+            self.root.after(0, lambda: self.status_bar.config(text=summary))
 
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Scan Error", f"Scan failed: {e}"))
-            self.root.after(0, lambda: self.stop_scan())
+            self.root.after(0, lambda: self.status_bar.config(text="Scan failed"))
 
-    def _add_result_to_tree(self, data_point):
-        """Add a data point to the results tree."""
-        self.results_tree.insert('', 'end', text=data_point['laser'],
-                                values=(f"{data_point['current_actual']:.1f}",
-                                       f"{data_point['power']:.3f}",
-                                       f"{data_point['voltage']:.2f}"))
+        finally:
+            # The writer has been joined and the CSV closed by now
+            self.root.after(0, self._scan_finished)
+
+    def _scan_lasers(self, lasers_to_scan, current_points, delay, epoch0, t0, pool, rows):
+        """Step each laser through the scan currents, queueing one row per point."""
+        for laser_name, laser_panel in lasers_to_scan:
+            if not self.scan_running:
+                break
+
+            # Ensure output is enabled
+            if not laser_panel.laser.get_ld_output_state():
+                laser_panel.laser.set_ld_output(True)
+                laser_panel.output_var.set(True)
+                laser_panel.update_output_indicator(True)
+                time.sleep(0.5)  # Allow output to stabilize
+
+            try:
+                self._scan_currents(laser_name, laser_panel, current_points, delay,
+                                    epoch0, t0, pool, rows)
+            except Exception:
+                # Do not leave the laser driven at a scan current: ramp back
+                # to the safety minimum before the error is reported
+                try:
+                    laser_panel.laser.ramp_current(laser_panel.safety_min_current)
+                    self.root.after(0, lambda p=laser_panel: p.current_var.set(
+                        p.safety_min_current))
+                except Exception:
+                    pass
+                raise
+
+            # Return to safe current after scan
+            if self.scan_running:
+                laser_panel.laser.set_ld_current(100)
+                self.root.after(0, lambda: laser_panel.current_var.set(100))
+
+    def _scan_currents(self, laser_name, laser_panel, current_points, delay,
+                       epoch0, t0, pool, rows):
+        """Step one laser through the scan currents, queueing one row per point."""
+        for current_ma in current_points:
+            if not self.scan_running:
+                break
+            if self.scan_write_error is not None:
+                raise IOError(f"Writing scan data failed: {self.scan_write_error}")
+
+            # Set current; the settling delay runs from here so
+            # the UI bookkeeping below does not stretch it
+            laser_panel.laser.set_ld_current(current_ma)
+            settle_deadline = time.monotonic() + delay
+            self.root.after(0, lambda c=current_ma: laser_panel.current_var.set(c))
+
+            # Update status
+            self.root.after(0, lambda: self.status_bar.config(
+                text=f"Scanning {laser_name}: {current_ma:.1f} mA"))
+
+            # Wait for settling
+            self._wait_until(settle_deadline)
+
+            # Take measurements; the laser is queried on the pool
+            # thread while this thread reads the power meter
+            laser = laser_panel.laser
+            laser_future = pool.submit(
+                lambda: (laser.get_ld_current_actual(), laser.get_ld_voltage()))
+
+            power = 0
+            if self.power_meter_connected and self.power_meter:
+                try:
+                    self.power_meter.updatePowerReading(0.1)
+                    power = self.power_meter.power * 1000  # Convert to mW
+                except:
+                    pass
+
+            actual_current, voltage = laser_future.result()
+
+            # Store data as a row in SCAN_FIELDNAMES order
+            timestamp = datetime.datetime.fromtimestamp(
+                epoch0 + (time.monotonic() - t0))
+            row = (timestamp.isoformat(), laser_name,
+                   current_ma, actual_current, voltage, power)
+            try:
+                rows.put(row, timeout=SCAN_WRITER_TIMEOUT_S)
+            except queue.Full:
+                raise IOError("Scan data writer is not keeping up") from None
+            self.scan_point_count += 1
+
+            if self.scan_power_min is None or power < self.scan_power_min:
+                self.scan_power_min = power
+            if self.scan_power_max is None or power > self.scan_power_max:
+                self.scan_power_max = power
+
+            # Update display
+            self.root.after(0, lambda r=row: self._add_result_to_tree(r))
+
+    def _scan_writer_loop(self, csvfile, rows):
+        """Write queued scan rows to the CSV until a None sentinel arrives.
+
+        A write failure is stored in scan_write_error for the scan loop to
+        act on; the queue is then drained so the scan thread never blocks.
+        """
+        row = ()
+        try:
+            writer = csv.writer(csvfile)
+            writer.writerow(SCAN_FIELDNAMES)
+            chunk = []
+            while True:
+                row = rows.get()
+                if row is not None:
+                    chunk.append(row)
+                    if len(chunk) < SCAN_FLUSH_EVERY:
+                        continue
+                writer.writerows(chunk)
+                csvfile.flush()
+                chunk.clear()
+                if row is None:
+                    break
+            # One durability barrier once the scan has finished
+            os.fsync(csvfile.fileno())
+        except Exception as e:
+            self.scan_write_error = e
+            while row is not None:
+                row = rows.get()
+
+    @staticmethod
+    def _wait_until(deadline):
+        """Sleep until the given time.monotonic() deadline, if not already past it."""
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _add_result_to_tree(self, row):
+        """Add a scan row (SCAN_FIELDNAMES order) to the results tree."""
+        _, laser_name, _, actual_current, voltage, power = row
+        self.results_tree.insert('', 'end', text=laser_name,
+                                values=(f"{actual_current:.1f}",
+                                       f"{power:.3f}",
+                                       f"{voltage:.2f}"))
 
     def export_scan_data(self):
         """Export scan data to CSV file."""
-        if not self.scan_data:
+        if not self.scan_point_count:
             messagebox.showwarning("No Data", "No scan data to export")
             return
 
@@ -894,27 +1035,22 @@ class DualLaserControlGUI:
 
         if filename:
             try:
-                with open(filename, 'w', newline='') as csvfile:
-                    fieldnames = ['timestamp', 'laser', 'current_set_mA', 'current_actual_mA',
-                                 'voltage_V', 'power_mW']
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-                    writer.writeheader()
-                    for data_point in self.scan_data:
-                        writer.writerow({
-                            'timestamp': data_point['timestamp'].isoformat(),
-                            'laser': data_point['laser'],
-                            'current_set_mA': data_point['current_set'],
-                            'current_actual_mA': data_point['current_actual'],
-                            'voltage_V': data_point['voltage'],
-                            'power_mW': data_point['power']
-                        })
+                shutil.copyfile(self.scan_csv_path, filename)
 
                 messagebox.showinfo("Export Complete", f"Data exported to {filename}")
 
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export data: {e}")
 
+    def _remove_scan_csv(self):
+        """Delete the streamed CSV from the previous scan, if any."""
+        if self.scan_csv_path:
+            try:
+                os.remove(self.scan_csv_path)
+            except OSError:
+                pass
+            self.scan_csv_path = None
+
     def emergency_stop_all(self):
         """Emergency stop all lasers."""
         # Stop any ongoing scan
@@ -968,6 +1104,7 @@ class DualLaserControlGUI:
             except:
                 pass
 
+        self._remove_scan_csv()
         self.root.destroy()
 
 
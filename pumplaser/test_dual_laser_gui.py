@@ -8,11 +8,11 @@ import os
 import sys
 import time
 import pathlib
-import glob
 
 # Add modules to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Python-Driver-for-Thorlabs-power-meter'))
-sys.path.extend(glob.glob(f'{pathlib.Path(__file__).parent.parent.resolve()}/Python-Driver-for-Thorlabs-power-meter/*/**/', recursive=True))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from thorlabs_driver_path import add_driver_paths
+add_driver_paths()
 
 from pump_laser import CLD1015, list_visa_resources
 from ThorlabsPowerMeter import ThorlabsPowerMeter
@@ -76,8 +76,6 @@ def test_laser(resource_name, laser_num):
 
         # Test each current level
         for current_ma in SAFE_CURRENTS_MA:
-            logger.info(f"\nTesting at {current_ma} mA:")
-
             # Set current
             laser.set_ld_current(current_ma)
             time.sleep(STABILIZATION_DELAY)
@@ -86,16 +84,24 @@ def test_laser(resource_name, laser_num):
             actual_ma = laser.get_ld_current_actual()
             voltage = laser.get_ld_voltage()
 
-            logger.info(f"  Set: {current_ma} mA")
-            logger.info(f"  Actual: {actual_ma:.2f} mA")
-            logger.info(f"  Voltage: {voltage:.2f} V")
+            # Report the whole point as one log record
+            lines = [
+                f"\nTesting at {current_ma} mA:",
+                f"  Set: {current_ma} mA",
+                f"  Actual: {actual_ma:.2f} mA",
+                f"  Voltage: {voltage:.2f} V",
+            ]
+            level = logging.INFO
 
             # Check if values are reasonable
             if current_ma > 0:
                 if abs(actual_ma - current_ma) > 5:  # 5mA tolerance
-                    logger.warning(f"  [WARNING] Current mismatch > 5mA")
+                    lines.append("  [WARNING] Current mismatch > 5mA")
+                    level = logging.WARNING
                 else:
-                    logger.info(f"  [OK] Current within tolerance")
+                    lines.append("  [OK] Current within tolerance")
+
+            logger.log(level, "\n".join(lines))
 
         # Safely shut down
         logger.info("\nShutting down laser...")
@@ -2,18 +2,17 @@
 """
 Test script for Thorlabs Power Meter automation
 """
-import os
-import sys
-import pathlib
-import glob
 import time
 
 # Add Python-Driver-for-Thorlabs-power-meter to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'Python-Driver-for-Thorlabs-power-meter'))
-sys.path.extend(glob.glob(f'{pathlib.Path(__file__).parent.resolve()}/Python-Driver-for-Thorlabs-power-meter/*/**/', recursive=True))
+from thorlabs_driver_path import add_driver_paths
+add_driver_paths()
 
 from ThorlabsPowerMeter import ThorlabsPowerMeter
 
+# Shared by the driver log and the console echo of each reading
+READING_FMT = 'Reading {}: {} {}'.format
+
 
 def test_power_meter():
     """Test power meter basic functionality."""
@@ -69,8 +68,9 @@ def test_power_meter():
             device.updatePowerReading(0.1)
             power = device.meterPowerReading
             unit = device.meterPowerUnit
-            logger.info(f'Reading {i+1}: {power} {unit}')
-            print(f"   Reading {i+1}: {power} {unit}")
+            line = READING_FMT(i + 1, power, unit)
+            logger.info(line)
+            print("   " + line)
             time.sleep(0.2)
         
         # Disconnect
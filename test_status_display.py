@@ -5,12 +5,10 @@ Quick test to demonstrate the device status display in different scenarios.
 
 import os
 import sys
-import pathlib
-import glob
 
 # Add modules to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'Python-Driver-for-Thorlabs-power-meter'))
-sys.path.extend(glob.glob(f'{pathlib.Path(__file__).parent.resolve()}/Python-Driver-for-Thorlabs-power-meter/*/**/', recursive=True))
+from thorlabs_driver_path import add_driver_paths
+add_driver_paths()
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'pumplaser'))
 
 from ThorlabsPowerMeter import ThorlabsPowerMeter
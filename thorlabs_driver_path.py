@@ -0,0 +1,21 @@
+"""
+Thorlabs power meter driver location
+
+Puts the vendored Python-Driver-for-Thorlabs-power-meter checkout on
+sys.path. Standard library only, so scripts can import it before anything
+that needs the driver.
+"""
+
+import sys
+import pathlib
+
+DRIVER_DIR = pathlib.Path(__file__).resolve().parent / 'Python-Driver-for-Thorlabs-power-meter'
+
+# Driver subdirectories holding importable modules and the .NET assembly
+DRIVER_SUBDIRS = ('GlobalLogger', 'Thorlabs_DotNet_dll')
+
+
+def add_driver_paths():
+    """Put the driver root first on sys.path and its subdirectories last."""
+    sys.path.insert(0, str(DRIVER_DIR))
+    sys.path.extend(str(DRIVER_DIR / sub) for sub in DRIVER_SUBDIRS)